@@ -88,7 +88,7 @@ async def upload_resume(file: UploadFile = File(...)):
             buffer.write(content)
         
         # Extract text from PDF
-        text = pdf_extractor.extract_text(str(file_path))
+        text = (await pdf_extractor.extract_async(str(file_path)))["text"]
         
         # Store resume data
         resume_id = data_store.add_resume(file.filename, text)
@@ -1,25 +1,55 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from typing import List, Dict, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import BinaryIO, List, Dict, Optional, Tuple
 from pydantic import BaseModel
 import uvicorn
+import asyncio
 import os
-import tempfile
+import threading
 import uuid as uuid_lib
-from pathlib import Path
 
 from modules.pdf_extractor import PDFExtractor
 from modules.preprocessor import TextPreprocessor
 from modules.embedder import Embedder
+from modules.hashing_embedder import HashingEmbedder
+from modules.embedding_cache import EmbeddingCache
+from modules.quantization import Int8Quantizer
 from modules.similarity import SimilarityCalculator
 from modules.skill_extractor import SkillExtractor
-from modules.clusterer import Clusterer
+from modules.clusterer import SessionClusterRegistry
 from modules.data_store import DataStore
+from modules.sqlite_data_store import SQLiteDataStore
+from modules.resume_record import ResumeRecord
+from modules.candidate_pager import CandidatePager
+from modules.compression import CompressionMiddleware
+from modules.body_limit import BodySizeLimitMiddleware
 from modules.category_classifier import CategoryClassifier
-import numpy as np
+from modules.text_analyzer import TextAnalyzer
+from modules.job_registry import JobRegistry
+from modules.executors import WorkerPools, cancel_on_disconnect
+from modules.content_cache import ContentCache
 app = FastAPI(title="Resume Screening API")
 
+# Maximum number of files accepted by one /upload_resumes request
+MAX_FILES_PER_UPLOAD = int(os.getenv("MAX_FILES_PER_UPLOAD", 500))
+
+# Maximum size of one uploaded PDF
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+# Maximum size of a whole /upload_resumes request body
+MAX_BULK_UPLOAD_BYTES = int(os.getenv("MAX_BULK_UPLOAD_BYTES", 100 * 1024 * 1024))
+
+# Upload bodies are capped while they stream in (room is left for the multipart headers);
+# each file's own cap is checked once parsed
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+app.add_middleware(BodySizeLimitMiddleware, limits={
+    "/upload_resume": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+    "/upload_resumes": MAX_BULK_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+})
+
+# Compress larger JSON responses (brotli if installed, else gzip); streamed responses pass through
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", 1024)))
+
 # Enable CORS for Flutter frontend
 app.add_middleware(
     CORSMiddleware,
@@ -30,40 +60,395 @@ app.add_middleware(
 )
 
 # Initialize modules
-pdf_extractor = PDFExtractor()
 preprocessor = TextPreprocessor()
-embedder = Embedder()
+# Optional persistent embedding cache, so restarts don't re-encode texts seen before
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+embedding_cache = (
+    EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 200000)))
+    if EMBEDDING_CACHE_PATH else None
+)
+# torch threads per server worker: the cores are shared by WEB_CONCURRENCY workers instead of each using all of them
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", 0)) or max(
+    1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+)
+Embedder.configure_threads(INFERENCE_THREADS)
+# The model loads (and warms up) on a background thread at startup, reported by /ready
+EMBEDDER_BACKGROUND_LOAD = os.getenv("EMBEDDER_BACKGROUND_LOAD", "1") == "1"
+EMBEDDER_WARMUP = os.getenv("EMBEDDER_WARMUP", "1") == "1"
+# "float32", or "int8" for dynamically quantized linear layers (kept only if its drift is within QUANTIZATION_MAX_DRIFT)
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "float32")
+if EMBEDDER_BACKEND == "int8":
+    QUANTIZATION_VALIDATION_PATH = os.getenv("QUANTIZATION_VALIDATION_PATH")
+    validation_texts = None
+    if QUANTIZATION_VALIDATION_PATH:
+        with open(QUANTIZATION_VALIDATION_PATH, encoding="utf-8") as f:
+            validation_texts = [line.strip() for line in f if line.strip()]
+    quantizer = Int8Quantizer(
+        max_drift=float(os.getenv("QUANTIZATION_MAX_DRIFT", 0.02)),
+        validation_texts=validation_texts
+    )
+elif EMBEDDER_BACKEND == "float32":
+    quantizer = None
+else:
+    raise ValueError(f"Unknown EMBEDDER_BACKEND: {EMBEDDER_BACKEND}")
+# "model" (sentence-transformers) or "hashing" (deterministic, model-free, much faster); the default for
+# requests without an X-Embedding-Mode header. A hashing deployment never loads the model
+EMBEDDER_MODE = os.getenv("EMBEDDER_MODE", "model")
+if EMBEDDER_MODE not in ("model", "hashing"):
+    raise ValueError(f"Unknown EMBEDDER_MODE: {EMBEDDER_MODE}")
+hashing_embedder = HashingEmbedder(
+    dimension=int(os.getenv("HASHING_DIMENSION", 384)),
+    seed=int(os.getenv("HASHING_SEED", 0))
+)
+embedder = Embedder(
+    cache=embedding_cache,
+    load=not EMBEDDER_BACKGROUND_LOAD and EMBEDDER_MODE == "model",
+    quantizer=quantizer,
+    # Long resumes are split into token-bounded chunks whose embeddings are pooled, instead of truncated
+    chunk_tokens=int(os.getenv("EMBED_CHUNK_TOKENS", 0)) or None,
+    max_chunks=int(os.getenv("EMBED_MAX_CHUNKS", 32)),
+    pooling=os.getenv("EMBED_POOLING", "mean")
+)
 similarity_calc = SimilarityCalculator(
     min_skill_overlap=0.2,  # 20% skill overlap threshold
     skill_penalty=0.5  # 50% penalty when below threshold (instead of 0)
 )
-skill_extractor = SkillExtractor()
-clusterer = Clusterer()
-data_store = DataStore()
+# Optional external skill taxonomy (one skill per line) on top of the built-in keywords
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH")
+skill_extractor = SkillExtractor.from_file(SKILL_TAXONOMY_PATH) if SKILL_TAXONOMY_PATH else SkillExtractor()
+# Cluster models are per session and fitted lazily (on /clusters or a labeled export)
+cluster_registry = SessionClusterRegistry(n_clusters=3)
+# "memory" keeps sessions in process memory; "sqlite" persists them to DATA_STORE_PATH
+DATA_STORE_BACKEND = os.getenv("DATA_STORE_BACKEND", "memory")
+# Sessions idle this long are evicted (0 keeps them); the byte budget bounds session memory
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", 24 * 60 * 60)) or None
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", 0)) or None
+if DATA_STORE_BACKEND == "sqlite":
+    data_store = SQLiteDataStore(
+        os.getenv("DATA_STORE_PATH", "./data/resumes.db"),
+        session_ttl=SESSION_TTL_SECONDS,
+        max_bytes=SESSION_MAX_BYTES
+    )
+elif DATA_STORE_BACKEND == "memory":
+    data_store = DataStore(session_ttl=SESSION_TTL_SECONDS, max_bytes=SESSION_MAX_BYTES)
+else:
+    raise ValueError(f"Unknown DATA_STORE_BACKEND: {DATA_STORE_BACKEND}")
+# Evicted sessions release their cluster models too
+data_store.add_eviction_listener(cluster_registry.drop)
 category_classifier = CategoryClassifier()
+# Shared one-pass analysis (cleaned text, skills, category) built on the modules above
+text_analyzer = TextAnalyzer(preprocessor, skill_extractor, category_classifier)
+
+# Pages of ranked candidates are selected without sorting whole sessions
+candidate_pager = CandidatePager()
+
+# Embedders by mode; requests can only pick the hashing mode in a hashing deployment
+embedders = {"model": embedder, "hashing": hashing_embedder} if EMBEDDER_MODE == "model" else {"hashing": hashing_embedder}
+
+# Analyzed job description profiles, reused across ranking requests (bounded LRU)
+job_registry = JobRegistry(text_analyzer, embedders[EMBEDDER_MODE], max_jobs=int(os.getenv("MAX_JOB_PROFILES", 256)))
+
+# Number of texts per SentenceTransformer.encode call when embedding many resumes
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+
+# CPU-bound stages run on these pools instead of the event loop
+worker_pools = WorkerPools(
+    thread_workers=int(os.getenv("CPU_THREAD_WORKERS", 0)) or None,
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_CPU_TASKS", 0)) or None
+)
+
+# PDF extraction is awaited on the event loop while the extraction processes do the work
+pdf_extractor = PDFExtractor(
+    engine=os.getenv("PDF_ENGINE", "auto"),
+    max_pages=int(os.getenv("PDF_MAX_PAGES", 50)),
+    time_budget=float(os.getenv("PDF_TIME_BUDGET_SECONDS", 20)),
+    pages_per_chunk=int(os.getenv("PDF_PAGES_PER_CHUNK", 4)),
+    # Its own processes, so workers stuck past the time budget can be killed
+    process_workers=int(os.getenv("PDF_PROCESS_WORKERS", 2))
+)
+
+def upload_cache_namespace(mode: str = EMBEDDER_MODE) -> str:
+    """Namespace of the upload cache for an embedding mode; set again once the model has loaded, as it depends on it"""
+    if not embedders[mode].loaded:
+        # Unique per process: which model ends up in use isn't known yet, so nothing persisted may match
+        model = f"loading-{uuid_lib.uuid4()}"
+    else:
+        model = embedders[mode].model_id
+    return "|".join([model, SKILL_TAXONOMY_PATH or "", os.getenv("PDF_ENGINE", "auto"), str(pdf_extractor.max_pages)])
+
+# Extracted text and features of uploaded files by content hash, so re-uploads skip all processing
+# The namespace keeps entries from another model or extraction setup from matching
+content_cache = ContentCache(
+    max_entries=int(os.getenv("UPLOAD_CACHE_SIZE", 1024)),
+    path=os.getenv("UPLOAD_CACHE_DIR") or None,
+    max_disk_entries=int(os.getenv("UPLOAD_CACHE_DISK_ENTRIES", 10000)),
+    namespace=upload_cache_namespace()
+)
+
+def upload_namespace(mode: str) -> str:
+    """Upload cache namespace of a request's embedding mode"""
+    return content_cache.namespace if mode == EMBEDDER_MODE else upload_cache_namespace(mode)
+
+# How often expired and over-budget sessions are evicted, off the request path
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", 60))
+
+async def sweep_sessions():
+    """Run the data store's session sweep periodically on the thread pool"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        try:
+            evicted = await worker_pools.run_in_thread(data_store.sweep)
+            if evicted:
+                print(f"Evicted {len(evicted)} sessions")
+        except Exception as e:
+            print(f"Session sweep failed: {e}")
+
+# Set once the model is loaded and warmed up; /ready reports 503 until then
+embedder_ready = threading.Event()
+
+def prepare_embedder():
+    """Load the model if needed and warm it up, so the first request doesn't pay for initialization"""
+    if EMBEDDER_MODE == "hashing":
+        # Nothing to load
+        embedder_ready.set()
+        return
+    if not embedder.loaded:
+        embedder.load()
+    content_cache.namespace = upload_cache_namespace()
+    if EMBEDDER_WARMUP:
+        try:
+            embedder.warm_up(batch_size=EMBED_BATCH_SIZE)
+        except Exception as e:
+            print(f"Model warm-up failed: {e}")
+    embedder_ready.set()
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    app.state.session_sweeper = asyncio.create_task(sweep_sessions())
+
+@app.on_event("startup")
+def start_embedder_loader():
+    # A plain thread, so loading doesn't hold a CPU pool worker
+    threading.Thread(target=prepare_embedder, name="embedder-loader", daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_worker_pools():
+    app.state.session_sweeper.cancel()
+    worker_pools.shutdown()
+    pdf_extractor.shutdown()
+    if embedding_cache is not None:
+        embedding_cache.close()
+    if isinstance(data_store, SQLiteDataStore):
+        data_store.close()
+
+async def run_cpu(request: Request, func, *args, **kwargs):
+    """Run CPU-bound work on the thread pool, cancelling it if the client disconnects"""
+    return await cancel_on_disconnect(request, worker_pools.run_in_thread(func, *args, **kwargs))
+
+def get_upload_buffer(file: UploadFile) -> BinaryIO:
+    """
+    Get the spooled buffer of an upload after enforcing the size cap
+    The multipart parser streams uploads in chunks into a SpooledTemporaryFile (memory up to
+    1 MB, disk beyond), so PDFs are read from there without another full copy or a temp file
+    """
+    buffer = file.file
+    buffer.seek(0, os.SEEK_END)
+    size = buffer.tell()
+    buffer.seek(0)
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{file.filename} exceeds the {MAX_UPLOAD_BYTES} byte upload limit"
+        )
+    return buffer
 
-# Use temporary directory for PDF processing (files deleted after extraction)
-TEMP_DIR = Path(tempfile.gettempdir()) / "resume_uploads"
-TEMP_DIR.mkdir(exist_ok=True)
+# Bounds how many upload buffers are read into memory for extraction at once
+upload_extraction_slots = asyncio.Semaphore(worker_pools.max_concurrent)
+
+async def extract_upload(buffer: BinaryIO) -> Dict:
+    """
+    Extract text from an upload buffer off the event loop
+    The extractor's processes do the work, so no CPU thread is held while waiting for them
+    Returns the extractor result: text plus engine, page counts and elapsed_ms
+    """
+    async with upload_extraction_slots:
+        return await pdf_extractor.extract_async(buffer)
+
+def store_resumes(session_id: str, entries: List[Tuple[str, str, Dict]]) -> List[str]:
+    """Add (filename, text, features) entries to a session, returning their resume IDs (one store call per entry)"""
+    return [data_store.add_resume(session_id, filename, text, features) for filename, text, features in entries]
+
+def get_cached_uploads(content_hashes: List[str]) -> List[Optional[Dict]]:
+    """Content cache entries for many uploads (None for misses); reads disk, so runs off the event loop"""
+    return [content_cache.get(content_hash) for content_hash in content_hashes]
+
+def cache_uploads(entries: List[Tuple[str, str, Dict, Dict]]):
+    """Cache (content hash, text, features, extraction report) entries; writes disk, so runs off the event loop"""
+    for content_hash, text, features, report in entries:
+        content_cache.put(content_hash, text, features, report)
+
+def extraction_report(extraction: Dict, cached: bool = False) -> Dict:
+    """Extraction stats returned with an upload"""
+    report = {key: value for key, value in extraction.items() if key != "text"}
+    report["cached"] = cached
+    return report
 
 # Session management - each user gets isolated data
 # Session ID can be passed via X-Session-ID header or generated automatically
-def get_session_id(x_session_id: Optional[str] = Header(None)) -> str:
-    """Get or create session ID from header"""
-    if x_session_id:
-        return x_session_id
+def get_embedding_mode(x_embedding_mode: Optional[str] = Header(None)) -> str:
+    """Embedding mode of the request from the X-Embedding-Mode header (deployment default if absent)"""
+    if not x_embedding_mode:
+        return EMBEDDER_MODE
+    if x_embedding_mode not in embedders:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown embedding mode: {x_embedding_mode} (available: {', '.join(embedders)})"
+        )
+    return x_embedding_mode
+
+def get_session_id(x_session_id: Optional[str] = Header(None), mode: str = Depends(get_embedding_mode)) -> str:
+    """
+    Get or create session ID from header
+    Embeddings of different modes can't be compared, so a non-default mode gets its own session ("<id>:<mode>")
+    An ID already naming another mode's session is rejected rather than mixing the two modes' embeddings
+    """
     # Generate new session ID if not provided
-    return str(uuid_lib.uuid4())
+    session_id = x_session_id or str(uuid_lib.uuid4())
+    base, _, suffix = session_id.rpartition(":")
+    if base and suffix in embedders:
+        if suffix != mode:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Session {session_id} belongs to the {suffix} embedding mode, not {mode} (send X-Embedding-Mode: {suffix})"
+            )
+    elif mode != EMBEDDER_MODE:
+        session_id = f"{session_id}:{mode}"
+    return session_id
+
+def get_job_profile(
+    job_description: Optional[str] = None,
+    job_id: Optional[str] = None,
+    mode: str = EMBEDDER_MODE
+) -> Optional[Dict]:
+    """
+    Resolve the job profile for a request
+    A job_id must come from POST /jobs; a raw job description is analyzed once and cached
+    The profile's embedding is the one of the requested embedding mode
+    """
+    if job_id:
+        profile = job_registry.get(job_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+    elif job_description:
+        profile = job_registry.create(job_description)
+    else:
+        return None
+    if mode != EMBEDDER_MODE:
+        profile = {**profile, "embedding": job_registry.embedding_for(profile, embedders[mode])}
+    return profile
+
+def compute_resume_features(texts: List[str], mode: str = EMBEDDER_MODE) -> List[Dict]:
+    """
+    Compute the text-derived features of resumes in one batch
+    Features are stored once at ingest so ranking only does arithmetic over them
+    """
+    analyses = [text_analyzer.analyze(text) for text in texts]
+    embeddings = embedders[mode].embed_batch(
+        [analysis["processed_text"] for analysis in analyses],
+        batch_size=EMBED_BATCH_SIZE
+    )
+    
+    return [
+        {
+            "processed_text": analysis["processed_text"],
+            "skills": analysis["skills"],
+            "category": analysis["category"],
+            "embedding": embedding
+        }
+        for analysis, embedding in zip(analyses, embeddings)
+    ]
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Parse a fields= projection (comma-separated names, or "all")
+    Without one, full text and embeddings are left out of candidate listings
+    """
+    if not fields:
+        return list(ResumeRecord.DEFAULT_FIELDS)
+    if fields == "all":
+        return list(ResumeRecord.RESPONSE_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ResumeRecord.RESPONSE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def candidates_to_dicts(session_id: str, candidates: List[ResumeRecord], fields: List[str]) -> List[Dict]:
+    """
+    Convert stored records to response dicts with only the requested fields
+    Embeddings, if requested, are attached from the session matrix here, at the response boundary
+    """
+    if "embedding" not in fields:
+        return [candidate.to_dict(fields=fields) for candidate in candidates]
+    
+    resume_ids, matrix, norms = data_store.get_embedding_matrix(session_id)
+    row_of = {resume_id: row for row, resume_id in enumerate(resume_ids)}
+    return [
+        candidate.to_dict(
+            matrix[row_of[candidate.resume_id]] * norms[row_of[candidate.resume_id]]
+            if candidate.resume_id in row_of else None,
+            fields=fields
+        )
+        for candidate in candidates
+    ]
+
+def get_cluster_labels(session_id: str, snapshot: Optional[Tuple] = None) -> Dict[str, int]:
+    """
+    Get cluster labels for a session, fitting its model only if the resume set changed
+    Labels are written back to the store so candidate listings show them
+    Args:
+        snapshot: (version, resume_ids, matrix) the caller already read, so the labels cover exactly its resume IDs
+    """
+    if snapshot is None:
+        version = data_store.get_session_version(session_id)
+        resume_ids, matrix, _ = data_store.get_embedding_matrix(session_id)
+    else:
+        version, resume_ids, matrix = snapshot
+    labels = cluster_registry.get_labels(session_id, version, resume_ids, matrix)
+    data_store.update_cluster_labels(session_id, labels)
+    return labels
 
 # Pydantic models
 class ProcessResumeRequest(BaseModel):
     resume_id: str
+    job_description: Optional[str] = None
+    job_id: Optional[str] = None
+
+class JobRequest(BaseModel):
     job_description: str
 
 @app.get("/")
 async def root():
     return {"message": "Resume Screening API - Use X-Session-ID header for private sessions"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the embedding model is loaded and warmed up"""
+    status = {
+        "ready": embedder_ready.is_set(),
+        "mode": EMBEDDER_MODE,
+        "model": embedder.model_name,
+        "model_loaded": embedder.loaded,
+        "fallback": embedder.loaded and embedder.model is None,
+        "load_error": embedder.load_error,
+        "backend": embedder.backend,
+        "quantization": embedder.quantization_report,
+        "load_seconds": embedder.load_seconds,
+        "warm_up_seconds": embedder.warm_up_seconds,
+        "inference_threads": INFERENCE_THREADS
+    }
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 @app.post("/create_session")
 async def create_session():
     """Create a new session and return session ID"""
@@ -74,7 +459,7 @@ async def create_session():
 async def delete_resume(resume_id: str, session_id: str = Depends(get_session_id)):
     """Delete a resume by ID (only from your session)"""
     try:
-        deleted = data_store.delete_resume(session_id, resume_id)
+        deleted = await worker_pools.run_in_thread(data_store.delete_resume, session_id, resume_id)
         if deleted:
             return {"message": f"Resume {resume_id} deleted successfully"}
         else:
@@ -86,79 +471,240 @@ async def delete_resume(resume_id: str, session_id: str = Depends(get_session_id
 async def delete_all_resumes(session_id: str = Depends(get_session_id)):
     """Delete all resumes (only from your session)"""
     try:
-        data_store.clear_all(session_id)
+        await worker_pools.run_in_thread(data_store.clear_all, session_id)
+        cluster_registry.drop(session_id)
         return {"message": "All resumes deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/upload_resume")
-async def upload_resume(file: UploadFile = File(...), session_id: str = Depends(get_session_id)):
-    """Upload a PDF resume and extract text (file is deleted after extraction). Isolated per session."""
+async def upload_resume(
+    request: Request,
+    file: UploadFile = File(...),
+    session_id: str = Depends(get_session_id),
+    mode: str = Depends(get_embedding_mode)
+):
+    """Upload a PDF resume and extract text (the file is never stored). Isolated per session."""
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
         
-        # Create temporary file for PDF processing
-        # Use unique temp filename to avoid conflicts
-        temp_filename = f"{uuid_lib.uuid4()}_{file.filename}"
-        file_path = TEMP_DIR / temp_filename
+        buffer = get_upload_buffer(file)
+        content_hash = await run_cpu(request, content_cache.content_hash, buffer, namespace=upload_namespace(mode))
+        cached = await run_cpu(request, content_cache.get, content_hash)
         
-        try:
-            # Save uploaded file temporarily
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            # Extract text from PDF
-            text = pdf_extractor.extract_text(str(file_path))
-            
-            # Store resume data (in-memory only, isolated per session)
-            resume_id = data_store.add_resume(session_id, file.filename, text)
+        if cached is not None:
+            # Byte-identical file seen before: reuse its text and features
+            text, features = cached["text"], cached["features"]
+            report = extraction_report(cached["extraction"], cached=True)
+        else:
+            # Extract text from PDF (pure-Python parsing, runs off the event loop)
+            extraction = await cancel_on_disconnect(request, extract_upload(buffer))
+            text = extraction["text"]
+            report = extraction_report(extraction)
             
-            return {
+            # Compute text features and embedding once, at ingest
+            features = (await run_cpu(request, compute_resume_features, [text], mode))[0]
+            await run_cpu(request, content_cache.put, content_hash, text, features, report)
+        
+        # Store resume data (in-memory only, isolated per session)
+        resume_id = await run_cpu(request, data_store.add_resume, session_id, file.filename, text, features)
+        
+        return {
+            "resume_id": resume_id,
+            "session_id": session_id,
+            "filename": file.filename,
+            "text": text[:500] + "..." if len(text) > 500 else text,  # Preview
+            "extraction": report
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/upload_resumes")
+async def upload_resumes(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    session_id: str = Depends(get_session_id),
+    mode: str = Depends(get_embedding_mode)
+):
+    """
+    Upload many PDF resumes in one request. Isolated per session.
+    Files are extracted in parallel and their features computed in one batch;
+    each file gets its own result or error, so one bad PDF doesn't fail the batch
+    """
+    try:
+        if len(files) > MAX_FILES_PER_UPLOAD:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_FILES_PER_UPLOAD} files per request")
+        
+        results: List[Optional[Dict]] = [None] * len(files)
+        buffers = []
+        
+        for i, file in enumerate(files):
+            if not file.filename.endswith('.pdf'):
+                results[i] = {"filename": file.filename, "error": "Only PDF files are supported"}
+                continue
+            try:
+                buffers.append((i, get_upload_buffer(file)))
+            except HTTPException as e:
+                results[i] = {"filename": file.filename, "error": e.detail}
+        
+        hashes = await cancel_on_disconnect(request, asyncio.gather(*[
+            worker_pools.run_in_thread(content_cache.content_hash, buffer, namespace=upload_namespace(mode))
+            for _, buffer in buffers
+        ]))
+        
+        # Files seen before reuse their cached text and features; identical files
+        # within this request are extracted once
+        ready = []  # (file index, text, features, extraction report)
+        pending: Dict[str, List[int]] = {}  # content hash -> indices of files with that content
+        pending_buffers = {}
+        cached_entries = await run_cpu(request, get_cached_uploads, hashes)
+        for (i, buffer), content_hash, cached in zip(buffers, hashes, cached_entries):
+            if cached is not None:
+                ready.append((i, cached["text"], cached["features"], extraction_report(cached["extraction"], cached=True)))
+            elif content_hash in pending:
+                pending[content_hash].append(i)
+            else:
+                pending[content_hash] = [i]
+                pending_buffers[content_hash] = buffer
+        
+        # Extract all new PDFs in parallel on the process pool, keeping per-file errors
+        outcomes = await cancel_on_disconnect(request, asyncio.gather(
+            *[extract_upload(pending_buffers[content_hash]) for content_hash in pending],
+            return_exceptions=True
+        ))
+        
+        extracted = []
+        for (content_hash, indices), outcome in zip(pending.items(), outcomes):
+            if isinstance(outcome, Exception):
+                for i in indices:
+                    results[i] = {"filename": files[i].filename, "error": str(outcome)}
+            else:
+                extracted.append((content_hash, indices, outcome))
+        
+        # Compute features for every extracted resume in one batch
+        features = await run_cpu(
+            request, compute_resume_features, [extraction["text"] for _, _, extraction in extracted], mode
+        )
+        
+        reports = [extraction_report(extraction) for _, _, extraction in extracted]
+        await run_cpu(request, cache_uploads, [
+            (content_hash, extraction["text"], resume_features, report)
+            for (content_hash, _, extraction), resume_features, report in zip(extracted, features, reports)
+        ])
+        for (_, indices, extraction), resume_features, report in zip(extracted, features, reports):
+            for i in indices:
+                ready.append((i, extraction["text"], resume_features, report))
+        
+        resume_ids = await run_cpu(request, store_resumes, session_id, [
+            (files[i].filename, text, resume_features) for i, text, resume_features, _ in ready
+        ])
+        for (i, text, resume_features, report), resume_id in zip(ready, resume_ids):
+            results[i] = {
                 "resume_id": resume_id,
-                "session_id": session_id,
-                "filename": file.filename,
-                "text": text[:500] + "..." if len(text) > 500 else text  # Preview
+                "filename": files[i].filename,
+                "text": text[:500] + "..." if len(text) > 500 else text,  # Preview
+                "extraction": report
             }
-        finally:
-            # Always delete the temporary file after processing
-            if file_path.exists():
-                file_path.unlink()
+        
+        return {
+            "session_id": session_id,
+            "uploaded": len(ready),
+            "failed": len(files) - len(ready),
+            "results": results
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs")
+async def create_job(job: JobRequest, request: Request):
+    """Analyze a job description once and return a job_id usable by ranking, processing and export"""
+    try:
+        if not job.job_description.strip():
+            raise HTTPException(status_code=400, detail="Job description is empty")
+        
+        profile = await run_cpu(request, job_registry.create, job.job_description)
+        return {
+            "job_id": profile["job_id"],
+            "skills": profile["skills"],
+            "category": profile["category"],
+            "created_at": profile["created_at"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get an analyzed job profile"""
+    profile = job_registry.get(job_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": profile["job_id"],
+        "job_description": profile["job_description"],
+        "skills": profile["skills"],
+        "category": profile["category"],
+        "created_at": profile["created_at"]
+    }
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Delete an analyzed job profile"""
+    if not job_registry.delete(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"message": f"Job {job_id} deleted successfully"}
+
 @app.post("/process_resume")
-async def process_resume(request: ProcessResumeRequest, session_id: str = Depends(get_session_id)):
-    """Process a resume against a job description (only resumes from your session)"""
+async def process_resume(
+    process_request: ProcessResumeRequest,
+    request: Request,
+    session_id: str = Depends(get_session_id),
+    mode: str = Depends(get_embedding_mode)
+):
+    """Process a resume against a job description or job_id (only resumes from your session)"""
     try:
-        resume_id = request.resume_id
-        job_description = request.job_description
-        resume = data_store.get_resume(session_id, resume_id)
+        resume_id = process_request.resume_id
+        job_profile = await run_cpu(
+            request, get_job_profile, process_request.job_description, process_request.job_id, mode
+        )
+        if job_profile is None:
+            raise HTTPException(status_code=400, detail="job_description or job_id is required")
+        
+        resume = await run_cpu(request, data_store.get_resume, session_id, resume_id)
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
         
-        resume_text = resume["text"]
-        job_desc = job_description
-        
-        # Preprocess texts
-        processed_resume = preprocessor.preprocess(resume_text)
-        processed_job = preprocessor.preprocess(job_desc)
+        # Use the features computed at ingest (older records are analyzed now)
+        if resume.processed_text is None:
+            features = (await run_cpu(request, compute_resume_features, [resume.text], mode))[0]
+            await run_cpu(request, data_store.update_resume_features, session_id, resume_id, **features)
+        else:
+            features = {
+                "skills": resume.skills,
+                "category": resume.category,
+                "embedding": await run_cpu(request, data_store.get_embedding, session_id, resume_id)
+            }
         
-        # Extract skills first (needed for skill gate)
-        resume_skills = skill_extractor.extract_skills(resume_text)
-        jd_skills = skill_extractor.extract_skills(job_desc)
+        # Skills are needed for skill gate
+        resume_skills = features["skills"]
+        jd_skills = job_profile["skills"]
         
-        # Generate embeddings
-        resume_embedding = embedder.embed(processed_resume)
-        job_embedding = embedder.embed(processed_job)
+        # The job embedding is precomputed in its profile
+        resume_embedding = features["embedding"]
+        job_embedding = job_profile["embedding"]
         
         # Calculate semantic similarity
         semantic_sim = similarity_calc.cosine_similarity(resume_embedding, job_embedding)
         
-        # Classify categories
-        resume_category = category_classifier.classify(resume_text)
-        job_category = category_classifier.classify(job_desc)
+        # Categories
+        resume_category = features["category"]
+        job_category = job_profile["category"]
         
         # Calculate final score with skill gating and weighted scoring
         score_result = similarity_calc.calculate_final_score(
@@ -172,24 +718,24 @@ async def process_resume(request: ProcessResumeRequest, session_id: str = Depend
         similarity_score = score_result["final_score"]
         skills = resume_skills
         
-        # Add embedding to clusterer for clustering
-        clusterer.add_embedding(resume_embedding)
-        
-        # Get cluster assignment (will be computed if not already done)
-        cluster_label = clusterer.assign_cluster(resume_embedding)
+        # Label with the session's last fitted cluster model (no refit on this path)
+        cluster_label = cluster_registry.assign(session_id, resume_embedding)
         
-        # Update resume data
-        data_store.update_resume_processing(
+        # Update resume data (the embedding is already stored, in the session matrix)
+        await run_cpu(
+            request,
+            data_store.update_resume_processing,
             session_id,
             resume_id,
             similarity_score,
             skills,
             cluster_label,
-            resume_embedding.tolist()
+            None
         )
         
         return {
             "resume_id": resume_id,
+            "job_id": job_profile["job_id"],
             "similarity_score": float(similarity_score),
             "semantic_similarity": score_result.get("semantic_similarity", 0.0),
             "skill_coverage": score_result.get("skill_coverage", 0.0),
@@ -198,205 +744,247 @@ async def process_resume(request: ProcessResumeRequest, session_id: str = Depend
             "skills": skills,
             "cluster_label": int(cluster_label)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def rank_session(session_id: str, job_profile: Dict, mode: str = EMBEDDER_MODE) -> List[ResumeRecord]:
+    """
+    Score all candidates of a session against a job profile and store the scores
+    Returns the session's candidates (scores updated in place)
+    """
+    candidates = data_store.get_all_candidates(session_id)
+    if not candidates:
+        return candidates
+    
+    job_embedding = job_profile["embedding"]
+    
+    # Resumes stored without ingest features are analyzed and embedded in one batch
+    pending = [
+        candidate for candidate in candidates
+        if candidate.processed_text is None and candidate.text
+    ]
+    if pending:
+        pending_features = compute_resume_features([candidate.text for candidate in pending], mode)
+        for candidate, features in zip(pending, pending_features):
+            data_store.update_resume_features(session_id, candidate.resume_id, **features)
+            # Stores may return copies, so keep the listed candidate in sync
+            candidate.update(
+                processed_text=features["processed_text"],
+                skills=features["skills"],
+                category=features["category"]
+            )
+    
+    # Score every embedded resume with one matrix-vector product
+    resume_ids, matrix, norms = data_store.get_embedding_matrix(session_id)
+    if not resume_ids:
+        return candidates
+    
+    semantic_sims = similarity_calc.cosine_similarities(matrix, norms, job_embedding)
+    
+    candidates_by_id = {candidate.resume_id: candidate for candidate in candidates}
+    # The two reads aren't atomic: resumes added after the candidate list was read are scored next time
+    rows = [i for i, resume_id in enumerate(resume_ids) if resume_id in candidates_by_id]
+    if len(rows) < len(resume_ids):
+        resume_ids = [resume_ids[i] for i in rows]
+        semantic_sims = semantic_sims[rows]
+        if not resume_ids:
+            return candidates
+    scored_candidates = [candidates_by_id[resume_id] for resume_id in resume_ids]
+    
+    # Calculate final scores with skill gating over the stored skills and categories
+    score_result = similarity_calc.calculate_final_scores(
+        semantic_similarities=semantic_sims,
+        resume_skills_list=[candidate.skills for candidate in scored_candidates],
+        jd_skills=job_profile["skills"],
+        resume_categories=[candidate.category for candidate in scored_candidates],
+        job_category=job_profile["category"]
+    )
+    
+    final_scores = score_result["final_score"].tolist()
+    semantic_values = score_result["semantic_similarity"].tolist()
+    coverage_values = score_result["skill_coverage"].tolist()
+    gate_values = score_result["skill_gate_passed"].tolist()
+    
+    # Update similarity scores in data store with one bulk write
+    scores = {
+        resume_id: {
+            "similarity_score": final_scores[i],
+            "semantic_similarity": semantic_values[i],
+            "skill_coverage": coverage_values[i],
+            "skill_gate_passed": gate_values[i],
+            "flag": score_result["flag"][i]
+        }
+        for i, resume_id in enumerate(resume_ids)
+    }
+    data_store.update_scores(session_id, scores)
+    for resume_id, fields in scores.items():
+        candidates_by_id[resume_id].update(**fields)
+    
+    return candidates
+
 @app.get("/top_candidates")
-async def top_candidates(job_description: str = "", session_id: str = Depends(get_session_id)):
-    """Get ranked candidates sorted by similarity score (only from your session)"""
+async def top_candidates(
+    request: Request,
+    job_description: str = "",
+    job_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    min_score: Optional[float] = None,
+    fields: Optional[str] = None,
+    session_id: str = Depends(get_session_id),
+    mode: str = Depends(get_embedding_mode)
+):
+    """
+    Get ranked candidates sorted by similarity score (only from your session)
+    Pages with limit plus offset or cursor (the previous page's next_cursor); min_score filters.
+    Without limit, all candidates are returned. fields= picks candidate fields ("all" for everything);
+    by default text, processed_text and embedding are omitted
+    """
     try:
-        candidates = data_store.get_all_candidates(session_id)
+        response_fields = parse_fields(fields)
+        if limit is not None and limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be at least 1")
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="offset must not be negative")
+        
+        # If a job description or job_id is provided, score all candidates against it
+        job_profile = await run_cpu(request, get_job_profile, job_description, job_id, mode)
+        if job_profile is not None:
+            candidates = await run_cpu(request, rank_session, session_id, job_profile, mode)
+        else:
+            candidates = await run_cpu(request, data_store.get_all_candidates, session_id)
         
         if not candidates:
-            return {"candidates": []}
+            return {"candidates": [], "total": 0, "next_cursor": None}
         
-        # If job description provided, process all candidates
-        if job_description:
-            processed_job = preprocessor.preprocess(job_description)
-            job_embedding = embedder.embed(processed_job)
-            
-         
-            
-            for candidate in candidates:
-                resume_emb = None
-                
-                # Generate embedding if it doesn't exist
-                if not candidate.get("embedding"):
-                    resume_text = candidate.get("text", "")
-                    if resume_text:
-                        processed_resume = preprocessor.preprocess(resume_text)
-                        resume_emb = embedder.embed(processed_resume)
-                        # Add embedding to clusterer
-                        clusterer.add_embedding(resume_emb)
-                        # Get cluster assignment
-                        cluster_label = clusterer.assign_cluster(resume_emb)
-                        # Extract skills
-                        skills = skill_extractor.extract_skills(resume_text)
-                        # Update resume data in store
-                        data_store.update_resume_processing(
-                            session_id,
-                            candidate["resume_id"],
-                            0.0,  # Similarity will be calculated below
-                            skills,
-                            cluster_label,
-                            resume_emb.tolist()
-                        )
-                        # Update candidate data for response
-                        candidate["embedding"] = resume_emb.tolist()
-                        candidate["cluster_label"] = int(cluster_label)
-                        candidate["skills"] = skills
-                    else:
-                        # No text available, skip
-                        continue
-                else:
-                    # Use existing embedding
-                    resume_emb = candidate["embedding"]
-                    # Convert list to numpy array if needed
-                    if isinstance(resume_emb, list):
-                        resume_emb = np.array(resume_emb)
-                
-                # Extract skills for skill gate
-                candidate_skills = candidate.get("skills", [])
-                if not candidate_skills:
-                    candidate_skills = skill_extractor.extract_skills(candidate.get("text", ""))
-                jd_skills = skill_extractor.extract_skills(job_description)
-                
-                # Calculate semantic similarity
-                semantic_sim = similarity_calc.cosine_similarity(resume_emb, job_embedding)
-                
-                # Classify categories
-                resume_category = category_classifier.classify(candidate.get("text", ""))
-                job_category = category_classifier.classify(job_description)
-                
-                # Calculate final score with skill gating
-                score_result = similarity_calc.calculate_final_score(
-                    semantic_similarity=semantic_sim,
-                    resume_skills=candidate_skills,
-                    jd_skills=jd_skills,
-                    resume_category=resume_category,
-                    job_category=job_category
-                )
-                
-                candidate["similarity_score"] = float(score_result["final_score"])
-                candidate["semantic_similarity"] = score_result.get("semantic_similarity", 0.0)
-                candidate["skill_coverage"] = score_result.get("skill_coverage", 0.0)
-                candidate["skill_gate_passed"] = score_result.get("skill_gate_passed", False)
-                if score_result.get("flag"):
-                    candidate["flag"] = score_result.get("flag")
-                # Update similarity score in data store
-                if candidate.get("resume_id"):
-                    existing_resume = data_store.get_resume(session_id, candidate["resume_id"])
-                    if existing_resume:
-                        data_store.update_resume_processing(
-                            session_id,
-                            candidate["resume_id"],
-                            float(score_result["final_score"]),
-                            existing_resume.get("skills", []),
-                            existing_resume.get("cluster_label", 0),
-                            existing_resume.get("embedding", resume_emb.tolist() if isinstance(resume_emb, np.ndarray) else resume_emb)
-                        )
-        
-        # Sort by similarity score (descending)
-        ranked_candidates = sorted(
-            candidates,
-            key=lambda x: x.get("similarity_score", 0.0),
-            reverse=True
-        )
+        # Select only the requested page by similarity score (descending)
+        try:
+            page = candidate_pager.select(candidates, limit, offset, cursor, min_score)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        return {"candidates": ranked_candidates}
+        page["candidates"] = await run_cpu(request, candidates_to_dicts, session_id, page["candidates"], response_fields)
+        return page
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def cluster_session(session_id: str) -> Dict:
+    """Cluster labels and 2D coordinates for a session (both cached until the session changes)"""
+    version = data_store.get_session_version(session_id)
+    resume_ids, matrix, _ = data_store.get_embedding_matrix(session_id)
+    
+    if len(resume_ids) < 2:
+        return {
+            "coordinates": [],
+            "cluster_labels": [],
+            "resume_ids": []
+        }
+    
+    # Cluster labels from the session model (fitted lazily, cached until the session changes)
+    labels = get_cluster_labels(session_id, (version, resume_ids, matrix))
+    cluster_labels = [labels[resume_id] for resume_id in resume_ids]
+    
+    # Get 2D coordinates for visualization (cached until the session changes)
+    coordinates = cluster_registry.get_coordinates(session_id, version, resume_ids, matrix)
+    
+    return {
+        "coordinates": coordinates.tolist(),
+        "cluster_labels": cluster_labels,
+        "resume_ids": resume_ids
+    }
+
 @app.get("/clusters")
-async def get_clusters(session_id: str = Depends(get_session_id)):
+async def get_clusters(request: Request, session_id: str = Depends(get_session_id)):
     """Get cluster visualization data (PCA/t-SNE coordinates) - only from your session"""
     try:
-        candidates = data_store.get_all_candidates(session_id)
-        
-        if len(candidates) < 2:
-            return {
-                "coordinates": [],
-                "cluster_labels": [],
-                "resume_ids": []
-            }
-        
-        # Get embeddings and labels
-        embeddings = []
-        cluster_labels = []
-        resume_ids = []
-        
-        for candidate in candidates:
-            if candidate.get("embedding"):
-                emb = candidate["embedding"]
-                # Convert list to numpy array if needed
-                if isinstance(emb, list):
-                    emb = np.array(emb)
-                embeddings.append(emb)
-                cluster_labels.append(candidate.get("cluster_label", 0))
-                resume_ids.append(candidate["resume_id"])
-        
-        if not embeddings:
-            return {
-                "coordinates": [],
-                "cluster_labels": [],
-                "resume_ids": []
-            }
-        
-        # Get 2D coordinates for visualization
-        coordinates = clusterer.get_visualization_coordinates(embeddings)
-        
-        return {
-            "coordinates": coordinates.tolist(),
-            "cluster_labels": cluster_labels,
-            "resume_ids": resume_ids
-        }
+        return await run_cpu(request, cluster_session, session_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/export_csv")
-async def export_csv(session_id: str = Depends(get_session_id)):
-    """Export ranked candidates as CSV (only from your session)"""
-    try:
-        candidates = data_store.get_all_candidates(session_id)
-        
-        # Sort by similarity score
-        ranked_candidates = sorted(
-            candidates,
-            key=lambda x: x.get("similarity_score", 0.0),
-            reverse=True
-        )
-        
-        # Generate CSV
-        import csv
-        import io
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header
+# Rows written per chunk of the streamed CSV export
+CSV_EXPORT_CHUNK_ROWS = 256
+
+def csv_export_rows(candidates: List[ResumeRecord]):
+    """
+    Generate the CSV export chunk by chunk, so the file is never held in memory at once
+    StreamingResponse runs sync generators on a worker thread, off the event loop
+    """
+    import csv
+    import io
+    
+    output = io.StringIO()
+    writer = csv.writer(output)
+    
+    # Header
+    writer.writerow([
+        "Rank", "Resume ID", "Filename", "Similarity Score",
+        "Skills", "Cluster Label", "Semantic Similarity", "Skill Coverage",
+        "Skill Gate Passed", "Flag", "Category"
+    ])
+    
+    # Data rows
+    for rank, candidate in enumerate(candidates, 1):
         writer.writerow([
-            "Rank", "Resume ID", "Filename", "Similarity Score",
-            "Skills", "Cluster Label"
+            rank,
+            candidate.resume_id,
+            candidate.filename,
+            f"{candidate.similarity_score:.4f}",
+            ", ".join(candidate.skills),
+            candidate.cluster_label,
+            f"{candidate.semantic_similarity:.4f}" if candidate.semantic_similarity is not None else "",
+            f"{candidate.skill_coverage:.4f}" if candidate.skill_coverage is not None else "",
+            candidate.skill_gate_passed if candidate.skill_gate_passed is not None else "",
+            candidate.flag or "",
+            candidate.category or ""
         ])
+        if rank % CSV_EXPORT_CHUNK_ROWS == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+    
+    yield output.getvalue()
+
+@app.get("/export_csv")
+async def export_csv(
+    request: Request,
+    job_description: str = "",
+    job_id: Optional[str] = None,
+    session_id: str = Depends(get_session_id),
+    mode: str = Depends(get_embedding_mode)
+):
+    """
+    Export ranked candidates as CSV, streamed row by row (only from your session)
+    Candidates are re-scored against job_id or job_description if given
+    """
+    try:
+        job_profile = await run_cpu(request, get_job_profile, job_description, job_id, mode)
+        if job_profile is not None:
+            candidates = await run_cpu(request, rank_session, session_id, job_profile, mode)
+        else:
+            candidates = await run_cpu(request, data_store.get_all_candidates, session_id)
         
-        # Data rows
-        for rank, candidate in enumerate(ranked_candidates, 1):
-            writer.writerow([
-                rank,
-                candidate["resume_id"],
-                candidate["filename"],
-                f"{candidate.get('similarity_score', 0.0):.4f}",
-                ", ".join(candidate.get("skills", [])),
-                candidate.get("cluster_label", 0)
-            ])
+        # The export is labeled, so make sure the session's cluster labels are current
+        labels = await run_cpu(request, get_cluster_labels, session_id)
+        for candidate in candidates:
+            candidate.cluster_label = labels.get(candidate.resume_id, candidate.cluster_label)
         
-        output.seek(0)
+        # Same order as /top_candidates
+        ranked_candidates = candidate_pager.select(candidates)["candidates"]
         
         return StreamingResponse(
-            iter([output.getvalue()]),
+            csv_export_rows(ranked_candidates),
             media_type="text/csv",
             headers={"Content-Disposition": "attachment; filename=ranked_candidates.csv"}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,85 @@
+import json
+from typing import Dict, Optional
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware capping request body size per path while the body streams in
+    Requests declaring a larger Content-Length are rejected before any of the body is read;
+    otherwise bytes are counted as they arrive and the request is cut off with a 413 once over the limit,
+    so an oversized upload is never fully buffered (or spooled to disk) by the form parser
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        """
+        Args:
+            app: The wrapped ASGI application
+            limits: Maximum body bytes by request path; other paths are not limited
+        """
+        self.app = app
+        self.limits = limits
+
+    @staticmethod
+    def _content_length(scope) -> Optional[int]:
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({"detail": f"Request body exceeds the {limit} byte limit"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    if not response_started:
+                        await self._reject(send, limit)
+                    # The app sees the client go away and stops reading
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # Parsing the cut-off body fails; the 413 has already been sent
+            if not rejected:
+                raise
@@ -0,0 +1,91 @@
+import base64
+import json
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.resume_record import ResumeRecord
+
+class CandidatePager:
+    """
+    Select one page of candidates ranked by similarity score without sorting the whole session
+    Order is score descending, then upload time and resume ID, so pages are stable between requests
+    """
+
+    @staticmethod
+    def _sort_key(candidate: ResumeRecord) -> Tuple[float, str, str]:
+        return (-candidate.similarity_score, candidate.uploaded_at, candidate.resume_id)
+
+    @staticmethod
+    def encode_cursor(candidate: ResumeRecord) -> str:
+        """Opaque cursor pointing just after a candidate in ranking order"""
+        key = [candidate.similarity_score, candidate.uploaded_at, candidate.resume_id]
+        return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[float, str, str]:
+        """Parse a cursor from encode_cursor (raises ValueError if malformed)"""
+        try:
+            score, uploaded_at, resume_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return float(score), str(uploaded_at), str(resume_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def select(
+        self,
+        candidates: Sequence[ResumeRecord],
+        limit: Optional[int] = None,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        min_score: Optional[float] = None
+    ) -> Dict:
+        """
+        Select a page of ranked candidates
+        Costs O(n + k log k) for a page ending at rank k (argpartition, then sorting k candidates)
+        Args:
+            candidates: All candidates of the session, in any order
+            limit: Page size (None returns everything after offset/cursor)
+            offset: Candidates to skip (applied after the cursor)
+            cursor: next_cursor of the previous page; continues right after it
+            min_score: Only candidates scoring at least this much
+        Returns:
+            Dictionary with the page's candidates, the number of matching candidates and the next cursor
+        """
+        scores = np.fromiter((candidate.similarity_score for candidate in candidates), dtype=np.float64, count=len(candidates))
+        mask = np.ones(len(candidates), dtype=bool)
+
+        if min_score is not None:
+            mask &= scores >= min_score
+        # Candidates matching the filter, wherever the cursor/offset put this page
+        total = int(mask.sum())
+
+        if cursor is not None:
+            after_score, after_uploaded_at, after_resume_id = self.decode_cursor(cursor)
+            ties = mask & (scores == after_score)
+            mask &= scores < after_score
+            for i in np.flatnonzero(ties):
+                candidate = candidates[i]
+                mask[i] = (candidate.uploaded_at, candidate.resume_id) > (after_uploaded_at, after_resume_id)
+
+        indices = np.flatnonzero(mask)
+        remaining = len(indices)
+        end = remaining if limit is None else min(remaining, offset + limit)
+        if offset >= end:
+            return {"candidates": [], "total": total, "next_cursor": None}
+
+        if end < remaining:
+            # Keep only the top `end` scores; ties at the cut are settled by the full sort key below
+            selected_scores = scores[indices]
+            threshold = np.partition(-selected_scores, end - 1)[end - 1]
+            above = indices[-selected_scores < threshold]
+            at_threshold = indices[-selected_scores == threshold]
+            at_threshold = sorted(at_threshold, key=lambda i: self._sort_key(candidates[i]))[:end - len(above)]
+            indices = np.concatenate([above, np.asarray(at_threshold, dtype=above.dtype)])
+
+        ranked = sorted((candidates[i] for i in indices), key=self._sort_key)
+        page = ranked[offset:end]
+        return {
+            "candidates": page,
+            "total": total,
+            "next_cursor": self.encode_cursor(page[-1]) if end < remaining else None
+        }
@@ -1,5 +1,6 @@
-import re
-from typing import Optional
+from typing import Dict, List, Optional
+
+from modules.keyword_matcher import KeywordMatcher
 
 class CategoryClassifier:
     """Classify resumes and job descriptions into categories"""
@@ -55,6 +56,15 @@ class CategoryClassifier:
         }
     }
     
+    def __init__(self):
+        # Map each keyword to the categories that list it, and match all of them in one pass
+        self.keyword_categories: Dict[str, List[str]] = {}
+        for category, config in self.CATEGORIES.items():
+            for keyword in config["keywords"]:
+                self.keyword_categories.setdefault(keyword, []).append(category)
+        self.keywords = list(self.keyword_categories)
+        self.matcher = KeywordMatcher(self.keywords)
+    
     def classify(self, text: str) -> Optional[str]:
         """
         Classify text into a category
@@ -63,22 +73,26 @@ class CategoryClassifier:
         if not text:
             return None
         
-        text_lower = text.lower()
+        return self.classify_scores(self.category_scores(self.matcher.count(text.lower())))
+    
+    def category_scores(self, keyword_counts: Dict[str, int]) -> Dict[str, float]:
+        """
+        Score each category from keyword occurrence counts
+        Counts may include keywords of other analyzers, those are ignored
+        """
         category_scores = {}
         
-        # Score each category based on keyword matches
-        for category, config in self.CATEGORIES.items():
-            score = 0
-            for keyword in config["keywords"]:
-                # Use word boundaries for better matching
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                matches = len(re.findall(pattern, text_lower))
-                score += matches * config["weight"]
-            
-            if score > 0:
-                category_scores[category] = score
+        # Keep CATEGORIES order so ties resolve the same way as before
+        for category in self.CATEGORIES:
+            category_scores[category] = 0
+        for keyword, count in keyword_counts.items():
+            for category in self.keyword_categories.get(keyword, ()):
+                category_scores[category] += count * self.CATEGORIES[category]["weight"]
         
-        # Return category with highest score, or None if no matches
+        return {category: score for category, score in category_scores.items() if score > 0}
+    
+    def classify_scores(self, category_scores: Dict[str, float]) -> Optional[str]:
+        """Return category with highest score, or None if no matches"""
         if category_scores:
             return max(category_scores, key=category_scores.get)
         
@@ -1,86 +1,190 @@
+import threading
+from collections import OrderedDict
 import numpy as np
 from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from typing import List
+from sklearn.decomposition import PCA, IncrementalPCA
+from typing import Dict, List, Optional
 
 class Clusterer:
-    """Cluster candidates using KMeans and generate visualization coordinates"""
-    
-    def __init__(self, n_clusters: int = 3):
+    """
+    Cluster candidates using KMeans and generate visualization coordinates
+    New embeddings update the nearest centroid online; a full KMeans refit runs
+    periodically (in a background thread by default) and is swapped in atomically
+    """
+
+    def __init__(
+        self,
+        n_clusters: int = 3,
+        refit_ratio: float = 0.25,
+        min_refit_interval: int = 20,
+        background_refit: bool = True
+    ):
+        """
+        Args:
+            n_clusters: Number of clusters (fewer while there are fewer embeddings)
+            refit_ratio: Run a full refit once the collection grew by this fraction since the last one
+            min_refit_interval: Minimum number of added embeddings between full refits
+            background_refit: Run periodic full refits in a background thread
+        """
         self.n_clusters = n_clusters
+        self.refit_ratio = refit_ratio
+        self.min_refit_interval = min_refit_interval
+        self.background_refit = background_refit
         self.kmeans = None
+        self.centroids: Optional[np.ndarray] = None
+        self.counts: Optional[np.ndarray] = None
         self.all_embeddings = []
         self.fitted = False
-    
+        # Number of embeddings the current centroids were last fully fitted on
+        self._fitted_size = 0
+        self._lock = threading.RLock()
+        self._refit_thread: Optional[threading.Thread] = None
+
+    def _target_clusters(self, n_samples: int) -> int:
+        """Number of clusters to fit for a collection of n_samples"""
+        return max(2, min(self.n_clusters, n_samples))
+
+    def _fit_kmeans(self, embeddings_array: np.ndarray) -> KMeans:
+        kmeans = KMeans(n_clusters=self._target_clusters(len(embeddings_array)), random_state=42, n_init=10)
+        kmeans.fit(embeddings_array)
+        return kmeans
+
+    def _swap_model(self, kmeans: KMeans, n_fitted: int):
+        """Install a fully fitted model, then replay embeddings added after its snapshot (holding the lock)"""
+        self.kmeans = kmeans
+        self.centroids = kmeans.cluster_centers_.astype(np.float32)
+        self.counts = np.bincount(kmeans.labels_, minlength=len(self.centroids)).astype(np.float64)
+        self._fitted_size = n_fitted
+        self.fitted = True
+        for embedding in self.all_embeddings[n_fitted:]:
+            self._update_centroid(embedding)
+
     def fit(self, embeddings: List[np.ndarray]):
         """Fit KMeans on embeddings"""
         if len(embeddings) < 2:
             return
-        
-        embeddings_array = np.array(embeddings)
-        n_clusters = min(self.n_clusters, len(embeddings))
-        
-        if n_clusters < 2:
-            n_clusters = 2
-        
-        self.kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        self.kmeans.fit(embeddings_array)
-        self.all_embeddings = embeddings
-        self.fitted = True
-    
+
+        embeddings_array = np.asarray(embeddings, dtype=np.float32)
+        kmeans = self._fit_kmeans(embeddings_array)
+        with self._lock:
+            self.all_embeddings = [row for row in embeddings_array]
+            self._swap_model(kmeans, len(embeddings_array))
+
+    def refit(self, background: bool = False):
+        """
+        Run a full KMeans refit on every embedding seen so far
+        In background mode the fit runs in a thread and the new model is swapped in when done
+        """
+        with self._lock:
+            if len(self.all_embeddings) < 2:
+                return
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return  # A refit is already running
+            snapshot = np.asarray(self.all_embeddings, dtype=np.float32)
+
+        def run():
+            try:
+                kmeans = self._fit_kmeans(snapshot)
+                with self._lock:
+                    self._swap_model(kmeans, len(snapshot))
+            except Exception as e:
+                print(f"Error refitting clusters: {e}")
+
+        if background:
+            self._refit_thread = threading.Thread(target=run, daemon=True)
+            self._refit_thread.start()
+        else:
+            run()
+
+    def wait_for_refit(self, timeout: Optional[float] = None):
+        """Block until a running background refit finishes"""
+        thread = self._refit_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _update_centroid(self, embedding: np.ndarray):
+        """Online k-means step: move the nearest centroid towards the embedding"""
+        label = int(self.assign_clusters(embedding.reshape(1, -1))[0])
+        self.counts[label] += 1
+        self.centroids[label] += (embedding - self.centroids[label]) / self.counts[label]
+
+    def assign_clusters(self, embeddings) -> np.ndarray:
+        """Assign cluster labels to a matrix of embeddings (one row each) in one vectorized step"""
+        embeddings_array = np.asarray(embeddings, dtype=np.float32)
+        if embeddings_array.ndim == 1:
+            embeddings_array = embeddings_array.reshape(1, -1)
+
+        centroids = self.centroids
+        if centroids is None:
+            return np.zeros(len(embeddings_array), dtype=int)
+
+        # Squared distances via ||x||^2 - 2 x.c + ||c||^2 (||x||^2 does not change the argmin)
+        distances = (centroids ** 2).sum(axis=1) - 2 * embeddings_array @ centroids.T
+        return distances.argmin(axis=1)
+
     def assign_cluster(self, embedding) -> int:
         """Assign a cluster label to an embedding"""
         # Convert to numpy array if needed
         if not isinstance(embedding, np.ndarray):
             embedding = np.array(embedding)
-        
+
         # If not fitted yet, try to fit
-        if not self.fitted or self.kmeans is None:
+        if not self.fitted or self.centroids is None:
             # Try to fit with existing embeddings if we have enough
             if len(self.all_embeddings) >= 2:
                 self.fit(self.all_embeddings)
             else:
                 # Not enough embeddings yet, return default cluster
                 return 0
-        
-        # Double-check: if still not fitted (e.g., fit returned early), return default
-        if self.kmeans is None:
-            return 0
-        
-        # Predict cluster - kmeans should be initialized now
+
         try:
-            cluster_label = self.kmeans.predict(embedding.reshape(1, -1))[0]
-            return int(cluster_label)
+            return int(self.assign_clusters(embedding)[0])
         except Exception as e:
             # Fallback if prediction fails
             print(f"Error predicting cluster: {e}")
             return 0
-    
+
     def add_embedding(self, embedding):
-        """Add embedding to the collection"""
-        # Convert to numpy array if needed
-        if not isinstance(embedding, np.ndarray):
-            embedding = np.array(embedding)
-        
-        self.all_embeddings.append(embedding)
-        # Refit if we have enough embeddings
-        if len(self.all_embeddings) >= 2:
-            self.fit(self.all_embeddings)
-    
-    def get_visualization_coordinates(self, embeddings) -> np.ndarray:
+        """Add embedding to the collection and update the clustering incrementally"""
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+
+        with self._lock:
+            self.all_embeddings.append(embedding)
+            n_samples = len(self.all_embeddings)
+            if n_samples < 2:
+                return
+
+            # Small collections (or ones that can now hold more clusters) are refit right away
+            if self.centroids is None or len(self.centroids) < self._target_clusters(n_samples):
+                self.refit(background=False)
+                return
+
+            self._update_centroid(embedding)
+
+            # Periodic full refit once the collection grew enough since the last one
+            grown = n_samples - self._fitted_size
+            if grown >= max(self.min_refit_interval, self.refit_ratio * self._fitted_size):
+                refit_in_background = self.background_refit
+            else:
+                return
+
+        self.refit(background=refit_in_background)
+
+    @staticmethod
+    def get_visualization_coordinates(embeddings) -> np.ndarray:
         """
         Get 2D coordinates for visualization using PCA (fallback to t-SNE for small sets)
         """
         if len(embeddings) < 2:
             # Return dummy coordinates
             return np.array([[0, 0] for _ in embeddings])
-        
+
         # Convert to numpy array, handling list of lists or list of arrays
         if isinstance(embeddings[0], list):
             embeddings_array = np.array(embeddings)
         else:
             embeddings_array = np.array(embeddings)
-        
+
         # Use PCA for dimensionality reduction (faster than t-SNE)
         # For small datasets, we can still use PCA effectively
         try:
@@ -90,7 +194,7 @@ class Clusterer:
             else:
                 # For very small datasets, just use first two dimensions
                 coordinates = embeddings_array[:, :2] if embeddings_array.shape[1] >= 2 else embeddings_array
-            
+
             return coordinates
         except Exception as e:
             print(f"Error in visualization: {e}")
@@ -100,3 +204,126 @@ class Clusterer:
             else:
                 return np.array([[0, 0] for _ in embeddings])
 
+
+class SessionClusterRegistry:
+    """
+    Per-session cluster models, fitted lazily when labels are requested
+    Labels are cached per session until the session's embedding set changes
+    """
+
+    def __init__(self, n_clusters: int = 3, max_sessions: int = 1024, projection_refit_ratio: float = 0.2):
+        """
+        Args:
+            n_clusters: Number of clusters per session
+            max_sessions: Maximum number of session models kept (least recently used are dropped)
+            projection_refit_ratio: Update the 2D projection with IncrementalPCA once this fraction
+                of new resumes arrived since its last fit (0 disables, new resumes are only projected)
+        """
+        self.n_clusters = n_clusters
+        self.max_sessions = max_sessions
+        self.projection_refit_ratio = projection_refit_ratio
+        # Structure: {session_id: {"clusterer", "version", "resume_ids", "labels"}}
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        # Structure: {session_id: {"pca", "version", "fitted_ids", "n_fitted", "coordinates"}}
+        self._projections: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_labels(self, session_id: str, version: int, resume_ids: List[str], matrix: np.ndarray) -> Dict[str, int]:
+        """
+        Get cluster labels for a session's embedding matrix (rows aligned with resume_ids)
+        Fits or updates the session model only when the version changed since the last call
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions.move_to_end(session_id)
+                if entry["version"] == version:
+                    return entry["labels"]
+
+        if len(resume_ids) < 2:
+            labels = {resume_id: 0 for resume_id in resume_ids}
+            clusterer = None
+        elif entry is not None and entry["clusterer"] is not None and entry["resume_ids"].issubset(resume_ids):
+            # Only additions since the last fit: update the existing model incrementally
+            clusterer = entry["clusterer"]
+            for resume_id, row in zip(resume_ids, matrix):
+                if resume_id not in entry["resume_ids"]:
+                    clusterer.add_embedding(row)
+            labels = dict(zip(resume_ids, clusterer.assign_clusters(matrix).tolist()))
+        else:
+            # First request or resumes were removed: full fit on the session's embeddings
+            clusterer = Clusterer(self.n_clusters, background_refit=False)
+            clusterer.fit(matrix)
+            labels = dict(zip(resume_ids, clusterer.assign_clusters(matrix).tolist()))
+
+        with self._lock:
+            self._sessions[session_id] = {
+                "clusterer": clusterer,
+                "version": version,
+                "resume_ids": set(resume_ids),
+                "labels": labels
+            }
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return labels
+
+    def get_coordinates(self, session_id: str, version: int, resume_ids: List[str], matrix: np.ndarray) -> np.ndarray:
+        """
+        Get 2D visualization coordinates for a session (rows aligned with resume_ids)
+        Cached per session version; new resumes are projected with the existing components
+        """
+        with self._lock:
+            entry = self._projections.get(session_id)
+            if entry is not None:
+                self._projections.move_to_end(session_id)
+                if entry["version"] == version:
+                    return entry["coordinates"]
+
+        if len(resume_ids) <= 2:
+            # Too few resumes for PCA, same fallback as get_visualization_coordinates
+            coordinates = Clusterer.get_visualization_coordinates(matrix)
+            entry = {"pca": None, "fitted_ids": set(), "n_fitted": 0}
+        elif entry is None or entry["pca"] is None:
+            pca = IncrementalPCA(n_components=2)
+            pca.partial_fit(matrix)
+            entry = {"pca": pca, "fitted_ids": set(resume_ids), "n_fitted": len(resume_ids)}
+        else:
+            new_ids = [resume_id for resume_id in resume_ids if resume_id not in entry["fitted_ids"]]
+            # Refit incrementally once enough new resumes arrived (a batch needs at least 2 rows)
+            if (
+                self.projection_refit_ratio > 0
+                and len(new_ids) >= max(2, self.projection_refit_ratio * entry["n_fitted"])
+            ):
+                new_rows = [row for resume_id, row in zip(resume_ids, matrix) if resume_id not in entry["fitted_ids"]]
+                entry["pca"].partial_fit(np.asarray(new_rows))
+                entry["fitted_ids"].update(new_ids)
+                entry["n_fitted"] += len(new_ids)
+
+        if entry["pca"] is not None:
+            coordinates = entry["pca"].transform(matrix)
+
+        entry["version"] = version
+        entry["coordinates"] = coordinates
+        with self._lock:
+            self._projections[session_id] = entry
+            self._projections.move_to_end(session_id)
+            while len(self._projections) > self.max_sessions:
+                self._projections.popitem(last=False)
+        return coordinates
+
+    def assign(self, session_id: str, embedding) -> int:
+        """Label an embedding with the session's last fitted model without refitting (0 if none yet)"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        if entry is None or entry["clusterer"] is None:
+            return 0
+        # Models are fitted on the L2-normalized matrix rows, so compare like with like
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        return entry["clusterer"].assign_cluster(embedding / max(float(np.linalg.norm(embedding)), 1e-12))
+
+    def drop(self, session_id: str):
+        """Forget a session's cluster model and projection"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._projections.pop(session_id, None)
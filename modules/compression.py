@@ -0,0 +1,106 @@
+import asyncio
+import gzip
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses with brotli or gzip, as the client accepts
+    Streaming responses (more than one body message, e.g. the CSV export) are passed through untouched,
+    so they keep flowing chunk by chunk
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        """
+        Args:
+            app: The wrapped ASGI application
+            minimum_size: Smaller bodies are sent as-is
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: brotli quality (0-11); low values are much faster for dynamic JSON
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, headers: List[Tuple[bytes, bytes]]) -> Optional[str]:
+        """Pick br or gzip from the request's Accept-Encoding header"""
+        accepted = set()
+        for name, value in headers:
+            if name == b"accept-encoding":
+                for item in value.decode("latin-1").split(","):
+                    coding, *params = item.split(";")
+                    quality = 1.0
+                    for param in params:
+                        key, _, number = param.strip().partition("=")
+                        if key == "q":
+                            try:
+                                quality = float(number)
+                            except ValueError:
+                                quality = 0.0
+                    if quality > 0:
+                        accepted.add(coding.strip().lower())
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose_encoding(scope.get("headers", []))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether the response is complete
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = list(start_message.get("headers", []))
+            already_encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+
+            if message.get("more_body", False) or already_encoded or len(body) < self.minimum_size:
+                # Streaming, already encoded or too small: send unchanged
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= 64 * 1024:
+                # Large bodies are compressed off the event loop (zlib and brotli release the GIL)
+                compressed = await asyncio.to_thread(self._compress, body, encoding)
+            else:
+                compressed = self._compress(body, encoding)
+            headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", b"Accept-Encoding")
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional
+
+import numpy as np
+
+class ContentCache:
+    """
+    Bounded LRU mapping a hash of uploaded file bytes to the extracted text and features
+    so byte-identical re-uploads skip extraction, analysis and embedding
+    Optionally persisted to a local directory (one JSON file per entry) to survive restarts
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+        max_disk_entries: int = 10000,
+        namespace: str = ""
+    ):
+        """
+        Args:
+            max_entries: Entries kept in memory (least recently used are dropped)
+            path: Directory for persisted entries (None keeps the cache in memory only)
+            max_disk_entries: Entries kept on disk (least recently used files are deleted)
+            namespace: Mixed into every hash, e.g. the model and extraction settings, so entries
+                computed under a different configuration never match
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.namespace = namespace
+        # Structure: {content_hash: entry}, most recently used last
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Structure: {content_hash: None} for entries on disk, most recently used last
+        self._disk_entries: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            files = [name for name in os.listdir(path) if name.endswith(".json")]
+            files.sort(key=lambda name: os.path.getmtime(os.path.join(path, name)))
+            for name in files:
+                self._disk_entries[name[:-len(".json")]] = None
+
+    def content_hash(self, buffer: BinaryIO, chunk_size: int = 1024 * 1024, namespace: Optional[str] = None) -> str:
+        """
+        Hash a file object in chunks (then rewind it), without reading it into memory at once
+        Args:
+            namespace: Namespace for this hash instead of the cache's own (e.g. another embedding mode)
+        """
+        digest = hashlib.sha256((self.namespace if namespace is None else namespace).encode("utf-8"))
+        buffer.seek(0)
+        for chunk in iter(lambda: buffer.read(chunk_size), b""):
+            digest.update(chunk)
+        buffer.seek(0)
+        return digest.hexdigest()
+
+    def _file_path(self, content_hash: str) -> str:
+        return os.path.join(self.path, f"{content_hash}.json")
+
+    def get(self, content_hash: str) -> Optional[Dict]:
+        """
+        Get the cached entry for a content hash (None on a miss)
+        Returns:
+            Dictionary with text, features and extraction stats
+        """
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is not None:
+                self._entries.move_to_end(content_hash)
+                return entry
+            on_disk = content_hash in self._disk_entries
+
+        if not on_disk:
+            return None
+
+        try:
+            with open(self._file_path(content_hash), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["features"]["embedding"] = np.asarray(entry["features"]["embedding"], dtype=np.float32)
+            os.utime(self._file_path(content_hash))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read cached upload {content_hash}: {e}")
+            with self._lock:
+                self._disk_entries.pop(content_hash, None)
+            return None
+
+        with self._lock:
+            if content_hash in self._disk_entries:
+                self._disk_entries.move_to_end(content_hash)
+            self._remember(content_hash, entry)
+        return entry
+
+    def put(self, content_hash: str, text: str, features: Dict, extraction: Optional[Dict] = None):
+        """Cache the text and ingest features computed for uploaded content"""
+        entry = {
+            "text": text,
+            "features": {**features, "embedding": np.asarray(features["embedding"], dtype=np.float32)},
+            "extraction": extraction or {}
+        }
+        with self._lock:
+            self._remember(content_hash, entry)
+
+        if self.path:
+            self._persist(content_hash, entry)
+
+    def _remember(self, content_hash: str, entry: Dict):
+        """Insert into the in-memory LRU (caller holds the lock)"""
+        self._entries[content_hash] = entry
+        self._entries.move_to_end(content_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _persist(self, content_hash: str, entry: Dict):
+        """Write an entry to disk (atomically, via rename) and delete the oldest files over the bound"""
+        record = {
+            **entry,
+            "features": {**entry["features"], "embedding": entry["features"]["embedding"].tolist()}
+        }
+        file_path = self._file_path(content_hash)
+        temp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(temp_path, file_path)
+        except OSError as e:
+            print(f"Could not persist cached upload {content_hash}: {e}")
+            return
+
+        with self._lock:
+            self._disk_entries[content_hash] = None
+            self._disk_entries.move_to_end(content_hash)
+            evicted = []
+            while len(self._disk_entries) > self.max_disk_entries:
+                evicted.append(self._disk_entries.popitem(last=False)[0])
+
+        for old_hash in evicted:
+            try:
+                os.remove(self._file_path(old_hash))
+            except OSError:
+                pass
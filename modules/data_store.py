@@ -1,41 +1,142 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import sys
+import threading
+import time
 import uuid
 from datetime import datetime
 import numpy as np
 
+from modules.embedding_matrix import EmbeddingMatrix
+from modules.resume_record import ResumeRecord
+
 class DataStore:
-    """In-memory data store for resumes and processing results with session isolation"""
+    """
+    In-memory data store for resumes and processing results with session isolation
+    Idle sessions expire after session_ttl and the least recently used ones are evicted while
+    the store is over max_bytes; both happen in sweep(), which a background task calls periodically
+    """
     
-    def __init__(self):
-        # Structure: {session_id: {resume_id: resume_data}}
-        self.resumes: Dict[str, Dict[str, Dict]] = {}
+    def __init__(self, session_ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            session_ttl: Seconds without any access after which a session is evicted (None keeps sessions)
+            max_bytes: Approximate memory budget for all sessions (None for no limit)
+        """
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        # Structure: {session_id: {resume_id: ResumeRecord}}
+        self.resumes: Dict[str, Dict[str, ResumeRecord]] = {}
+        # Structure: {session_id: EmbeddingMatrix} - the only copy of each embedding, as float32 rows
+        self.matrices: Dict[str, EmbeddingMatrix] = {}
+        # Structure: {session_id: bytes held by its records} - the matrix is counted separately
+        self._record_bytes: Dict[str, int] = {}
+        # Structure: {session_id: last access (monotonic seconds)}, least recently used first
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        # Called with the session ID after a session is evicted (e.g. to drop derived caches)
+        self._eviction_listeners: List[Callable[[str], None]] = []
+        # Handlers run ranking and ingest on worker threads, so every public method holds this lock
+        self._lock = threading.RLock()
     
-    def _get_session_resumes(self, session_id: str) -> Dict[str, Dict]:
-        """Get resumes for a specific session"""
+    def _get_session_resumes(self, session_id: str) -> Dict[str, ResumeRecord]:
+        """Get resumes for a specific session, creating it (write paths only)"""
         if session_id not in self.resumes:
             self.resumes[session_id] = {}
+            self._record_bytes[session_id] = 0
+        self._touch(session_id)
         return self.resumes[session_id]
     
-    def add_resume(self, session_id: str, filename: str, text: str) -> str:
-        """Add a new resume and return its ID (isolated by session)"""
-        session_resumes = self._get_session_resumes(session_id)
-        resume_id = str(uuid.uuid4())
-        session_resumes[resume_id] = {
-            "resume_id": resume_id,
-            "filename": filename,
-            "text": text,
-            "similarity_score": 0.0,
-            "skills": [],
-            "cluster_label": 0,
-            "embedding": None,
-            "uploaded_at": datetime.now().isoformat()
-        }
-        return resume_id
-    
-    def get_resume(self, session_id: str, resume_id: str) -> Optional[Dict]:
+    def _get_session_matrix(self, session_id: str) -> EmbeddingMatrix:
+        """Get the embedding matrix for a specific session, creating it (write paths only)"""
+        if session_id not in self.matrices:
+            # Start small: most sessions hold a handful of resumes and the matrix grows by doubling
+            self.matrices[session_id] = EmbeddingMatrix(initial_capacity=8)
+        return self.matrices[session_id]
+    
+    def _find_session_resumes(self, session_id: str) -> Optional[Dict[str, ResumeRecord]]:
+        """Get resumes for a session without creating it (read paths)"""
+        session_resumes = self.resumes.get(session_id)
+        if session_resumes is not None:
+            self._touch(session_id)
+        return session_resumes
+    
+    def _touch(self, session_id: str):
+        self._last_access[session_id] = time.monotonic()
+        self._last_access.move_to_end(session_id)
+    
+    @staticmethod
+    def _size_of(resume: ResumeRecord) -> int:
+        """Approximate bytes held by a record (its embedding is in the session matrix)"""
+        size = sys.getsizeof(resume) + sys.getsizeof(resume.text) + sys.getsizeof(resume.filename)
+        if resume.processed_text is not None:
+            size += sys.getsizeof(resume.processed_text)
+        return size + sys.getsizeof(resume.skills) + sum(sys.getsizeof(skill) for skill in resume.skills)
+    
+    def add_eviction_listener(self, listener: Callable[[str], None]):
+        """Register a callback run with the session ID of every evicted session"""
+        self._eviction_listeners.append(listener)
+    
+    def add_resume(self, session_id: str, filename: str, text: str, features: Optional[Dict] = None) -> str:
+        """
+        Add a new resume and return its ID (isolated by session)
+        Args:
+            features: Optional ingest features (processed_text, skills, category, embedding)
+        """
+        with self._lock:
+            session_resumes = self._get_session_resumes(session_id)
+            resume_id = str(uuid.uuid4())
+            resume = ResumeRecord(
+                resume_id=resume_id,
+                filename=filename,
+                text=text,
+                uploaded_at=datetime.now().isoformat()
+            )
+            session_resumes[resume_id] = resume
+            self._record_bytes[session_id] += self._size_of(resume)
+            if features is not None:
+                self.update_resume_features(session_id, resume_id, **features)
+            return resume_id
+    
+    def update_resume_features(
+        self,
+        session_id: str,
+        resume_id: str,
+        processed_text: str,
+        skills: List[str],
+        category: Optional[str],
+        embedding,
+        cluster_label: Optional[int] = None
+    ):
+        """Store the text-derived features of a resume (computed once, at ingest)"""
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is not None and resume_id in session_resumes:
+                resume = session_resumes[resume_id]
+                previous_size = self._size_of(resume)
+                resume.processed_text = processed_text
+                resume.skills = list(skills)
+                resume.category = category
+                if cluster_label is not None:
+                    resume.cluster_label = cluster_label
+                self._record_bytes[session_id] += self._size_of(resume) - previous_size
+                if embedding is not None:
+                    self._get_session_matrix(session_id).set(resume_id, embedding)
+    
+    def get_resume(self, session_id: str, resume_id: str) -> Optional[ResumeRecord]:
         """Get resume by ID (only if it belongs to the session)"""
-        session_resumes = self._get_session_resumes(session_id)
-        return session_resumes.get(resume_id)
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is None:
+                return None
+            return session_resumes.get(resume_id)
+    
+    def get_embedding(self, session_id: str, resume_id: str) -> Optional[np.ndarray]:
+        """Get a copy of a resume's float32 embedding (None if it has none)"""
+        with self._lock:
+            matrix = self.matrices.get(session_id)
+            if matrix is None:
+                return None
+            return matrix.get_raw(resume_id)
     
     def update_resume_processing(
         self,
@@ -46,34 +147,144 @@ class DataStore:
         cluster_label: int,
         embedding
     ):
-        """Update resume with processing results (only if it belongs to the session)"""
-        session_resumes = self._get_session_resumes(session_id)
-        if resume_id in session_resumes:
-            # Convert numpy array to list if needed
-            if isinstance(embedding, np.ndarray):
-                embedding = embedding.tolist()
-            
-            session_resumes[resume_id]["similarity_score"] = similarity_score
-            session_resumes[resume_id]["skills"] = skills
-            session_resumes[resume_id]["cluster_label"] = cluster_label
-            session_resumes[resume_id]["embedding"] = embedding
-            session_resumes[resume_id]["processed_at"] = datetime.now().isoformat()
+        """
+        Update resume with processing results (only if it belongs to the session)
+        Args:
+            embedding: New embedding for the resume, or None to keep the stored one
+        """
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is not None and resume_id in session_resumes:
+                resume = session_resumes[resume_id]
+                previous_size = self._size_of(resume)
+                resume.update(
+                    similarity_score=similarity_score,
+                    skills=skills,
+                    cluster_label=cluster_label,
+                    processed_at=datetime.now().isoformat()
+                )
+                self._record_bytes[session_id] += self._size_of(resume) - previous_size
+                
+                if embedding is not None:
+                    self._get_session_matrix(session_id).set(resume_id, embedding)
+    
+    def update_scores(self, session_id: str, scores: Dict[str, Dict]):
+        """
+        Bulk write-back of ranking results
+        Args:
+            scores: {resume_id: {field: value}} merged into each resume of the session
+        """
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is None:
+                return
+            processed_at = datetime.now().isoformat()
+            for resume_id, fields in scores.items():
+                resume = session_resumes.get(resume_id)
+                if resume is not None:
+                    resume.update(**fields, processed_at=processed_at)
+    
+    def update_cluster_labels(self, session_id: str, labels: Dict[str, int]):
+        """Bulk write-back of cluster labels ({resume_id: label})"""
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is None:
+                return
+            for resume_id, label in labels.items():
+                resume = session_resumes.get(resume_id)
+                if resume is not None:
+                    resume.cluster_label = label
+    
+    def get_session_version(self, session_id: str) -> int:
+        """Version of the session's embedding set, changes whenever a resume embedding is added or removed"""
+        with self._lock:
+            matrix = self.matrices.get(session_id)
+            return matrix.version if matrix is not None else 0
+    
+    def get_embedding_matrix(self, session_id: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Get the session's embedding matrix for vectorized ranking
+        Returns (resume_ids, L2-normalized float32 matrix, raw norms) with rows aligned to resume_ids
+        Read the session version before the matrix when caching results derived from it
+        """
+        with self._lock:
+            matrix = self.matrices.get(session_id)
+            if matrix is None:
+                return [], np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.float32)
+            resume_ids, matrix, norms = matrix.view()
+            # Copies, so callers can compute on them while resumes are added or removed
+            return resume_ids, matrix.copy(), norms.copy()
     
-    def get_all_candidates(self, session_id: str) -> List[Dict]:
+    def get_all_candidates(self, session_id: str) -> List[ResumeRecord]:
         """Get all candidates for a specific session"""
-        session_resumes = self._get_session_resumes(session_id)
-        return list(session_resumes.values())
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is None:
+                return []
+            return list(session_resumes.values())
     
     def delete_resume(self, session_id: str, resume_id: str) -> bool:
         """Delete a resume by ID (only if it belongs to the session). Returns True if deleted, False if not found"""
-        session_resumes = self._get_session_resumes(session_id)
-        if resume_id in session_resumes:
-            del session_resumes[resume_id]
-            return True
-        return False
+        with self._lock:
+            session_resumes = self._find_session_resumes(session_id)
+            if session_resumes is not None and resume_id in session_resumes:
+                self._record_bytes[session_id] -= self._size_of(session_resumes.pop(resume_id))
+                self._get_session_matrix(session_id).remove(resume_id)
+                return True
+            return False
     
     def clear_all(self, session_id: str):
         """Clear all stored data for a specific session"""
-        if session_id in self.resumes:
-            self.resumes[session_id].clear()
-
+        with self._lock:
+            if session_id in self.resumes:
+                self.resumes[session_id].clear()
+                self._record_bytes[session_id] = 0
+            if session_id in self.matrices:
+                self.matrices[session_id].clear()
+    
+    def session_bytes(self, session_id: str) -> int:
+        """Approximate bytes held by a session (records plus its allocated embedding matrix)"""
+        with self._lock:
+            matrix = self.matrices.get(session_id)
+            return self._record_bytes.get(session_id, 0) + (matrix.nbytes if matrix is not None else 0)
+    
+    def total_bytes(self) -> int:
+        """Approximate bytes held by all sessions"""
+        with self._lock:
+            return sum(self.session_bytes(session_id) for session_id in self.resumes)
+    
+    def _evict(self, session_id: str):
+        """Drop a session entirely (caller holds the lock)"""
+        self.resumes.pop(session_id, None)
+        self.matrices.pop(session_id, None)
+        self._record_bytes.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+    
+    def sweep(self) -> List[str]:
+        """
+        Evict sessions idle longer than session_ttl, then least recently used sessions
+        until the store is within max_bytes. Returns the evicted session IDs
+        """
+        evicted = []
+        with self._lock:
+            if self.session_ttl is not None:
+                cutoff = time.monotonic() - self.session_ttl
+                # Least recently used first, so stop at the first session still in use
+                for session_id, last_access in list(self._last_access.items()):
+                    if last_access > cutoff:
+                        break
+                    self._evict(session_id)
+                    evicted.append(session_id)
+            
+            if self.max_bytes is not None:
+                total = self.total_bytes()
+                while total > self.max_bytes and self._last_access:
+                    session_id = next(iter(self._last_access))
+                    total -= self.session_bytes(session_id)
+                    self._evict(session_id)
+                    evicted.append(session_id)
+        
+        for session_id in evicted:
+            for listener in self._eviction_listeners:
+                listener(session_id)
+        return evicted
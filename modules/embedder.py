@@ -1,41 +1,243 @@
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from typing import List, Optional, Tuple
 import os
+import threading
+import time
+
+from modules.embedding_cache import EmbeddingCache
+from modules.quantization import Int8Quantizer
+from modules.hashing_embedder import HashingEmbedder
 
 class Embedder:
     """Generate embeddings using sentence-transformers"""
-    
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        load: bool = True,
+        quantizer: Optional[Int8Quantizer] = None,
+        model: Optional[SentenceTransformer] = None,
+        chunk_tokens: Optional[int] = None,
+        max_chunks: int = 32,
+        pooling: str = "mean"
+    ):
         """
         Initialize the embedding model
         Uses a lightweight model for faster processing
+        Args:
+            cache: Optional persistent cache consulted before encoding (model outputs only)
+            load: Load the model now; with False call load() later (e.g. on a background thread)
+                  and embedding calls wait until it has finished
+            quantizer: Use the dynamic int8 backend, validated by this quantizer; float32 is kept if
+                       quantization fails or drifts too far
+            model: An already built model to use instead of loading model_name (e.g. a small local model)
+            chunk_tokens: Tokens per chunk when long texts are split, at most the model's max sequence length (None for that)
+            max_chunks: Chunks encoded per text at most; the rest of a very long text is ignored
+            pooling: How chunk embeddings are combined per text, "mean" (weighted by chunk length) or "max"
+        """
+        if pooling not in ("mean", "max"):
+            raise ValueError(f"Unknown pooling: {pooling}")
+        self.model_name = model_name
+        self.cache = cache
+        self.quantizer = quantizer
+        self._provided_model = model
+        self.chunk_tokens = chunk_tokens
+        self.max_chunks = max_chunks
+        self.pooling = pooling
+        self.model = None
+        # "float32" or "int8", whichever the loaded model actually runs
+        self.backend = "float32"
+        # Drift of the int8 model against the float model on the quantizer's validation texts
+        self.quantization_report: Optional[dict] = None
+        # Default dimension for all-MiniLM-L6-v2 (also used by the fallback)
+        self.dimension = 384
+        # Deterministic model-free embeddings, used if the model can't be loaded
+        self.hashing = HashingEmbedder(self.dimension)
+        self.load_seconds: Optional[float] = None
+        self.load_error: Optional[str] = None
+        self.warm_up_seconds: Optional[float] = None
+        self._loaded = threading.Event()
+        if load:
+            self.load()
+
+    @staticmethod
+    def configure_threads(num_threads: int):
+        """
+        Set torch's intra-op thread count for this process
+        With several server workers per machine, each should get its share of the cores instead of all of them
         """
+        import torch
+        torch.set_num_threads(num_threads)
+
+    def load(self):
+        """Load the model, falling back to the hash embedding if it can't be loaded"""
+        started = time.perf_counter()
         try:
-            self.model = SentenceTransformer(model_name,cache_folder="./models")
+            self.model = self._provided_model or SentenceTransformer(self.model_name,cache_folder="./models")
         except Exception as e:
             print(f"Error loading model: {e}")
             print("Falling back to a simpler approach...")
             self.model = None
-    
+            self.load_error = str(e)
+
+        if self.model and self.quantizer is not None:
+            self._quantize()
+        if self.model:
+            self.dimension = self.model.get_sentence_embedding_dimension() or self.dimension
+        self.load_seconds = time.perf_counter() - started
+        self._loaded.set()
+
+    def _quantize(self):
+        """Switch to the int8 model if it passes validation, else keep float32"""
+        try:
+            quantized, self.quantization_report = self.quantizer.apply(self.model)
+        except Exception as e:
+            print(f"Error quantizing model: {e}")
+            self.quantization_report = {"error": str(e), "accepted": False}
+            return
+        if quantized is None:
+            print(f"Int8 model rejected (drift {self.quantization_report['drift']:.4f}), using float32")
+            return
+        self.model = quantized
+        self.backend = "int8"
+
+    @property
+    def model_id(self) -> str:
+        """Identity of the embeddings produced, for caches: model name plus a suffix for int8"""
+        if self.loaded and not self.model:
+            return self.hashing.model_id
+        model_id = self.model_name if self.backend == "float32" else f"{self.model_name}:{self.backend}"
+        # Chunking settings change the embeddings of long texts
+        return f"{model_id}|chunks={self.chunk_tokens or 'auto'}/{self.max_chunks}/{self.pooling}"
+
+    @property
+    def loaded(self) -> bool:
+        """Whether load() has finished (successfully or with the fallback)"""
+        return self._loaded.is_set()
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Block until load() has finished. Returns False on timeout"""
+        return self._loaded.wait(timeout)
+
+    def warm_up(self, batch_size: int = 32):
+        """
+        Run throwaway encodes so kernel initialization and allocations happen before the first request
+        Covers a single short text and a full batch of resume-length texts; bypasses the cache
+        """
+        self.wait_until_loaded()
+        started = time.perf_counter()
+        if self.model:
+            sample = "Experienced software engineer skilled in Python, SQL, cloud infrastructure and machine learning. "
+            self.model.encode([sample], convert_to_numpy=True)
+            self.model.encode([sample * 20] * batch_size, batch_size=batch_size, convert_to_numpy=True)
+        self.warm_up_seconds = time.perf_counter() - started
+
     def embed(self, text: str) -> np.ndarray:
         """
         Generate embedding for given text
         """
         if not text:
             # Return zero vector if text is empty
-            return np.zeros(384)  # Default dimension for all-MiniLM-L6-v2
-        
+            return np.zeros(self.dimension, dtype=np.float32)
+
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generate embeddings for many texts with batched encode calls
+        Returns an array of shape (len(texts), dimension); empty texts get a zero vector
+        """
+        self.wait_until_loaded()
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        # Only non-empty texts go to the model
+        indices = [i for i, text in enumerate(texts) if text]
+        if not indices:
+            return embeddings
+
         if self.model:
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            return embedding
+            if self.cache is not None:
+                # Encode only the texts the cache doesn't have
+                cached = self.cache.get_many(self.model_id, [texts[i] for i in indices], self.dimension)
+                for i, embedding in zip(indices, cached):
+                    if embedding is not None:
+                        embeddings[i] = embedding
+                indices = [i for i, embedding in zip(indices, cached) if embedding is None]
+                if not indices:
+                    return embeddings
+
+            # Identical texts are encoded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in indices))
+            encoded = self._encode_chunked(unique_texts, batch_size)
+            row_of = {text: row for row, text in enumerate(unique_texts)}
+            embeddings[indices] = encoded[[row_of[texts[i]] for i in indices]]
+
+            if self.cache is not None:
+                self.cache.put_many(self.model_id, unique_texts, encoded)
         else:
-            # Fallback: simple TF-IDF like approach (very basic)
-            # In production, always use proper model
-            words = text.split()
-            vocab_size = 384
-            embedding = np.zeros(vocab_size)
-            for i, word in enumerate(words[:vocab_size]):
-                hash_val = hash(word) % vocab_size
-                embedding[hash_val] += 1.0 / (i + 1)
-            return embedding / (np.linalg.norm(embedding) + 1e-8)
+            embeddings[indices] = self.hashing.embed_batch([texts[i] for i in indices])
+
+        return embeddings
+
+    def _chunk(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Split a text into chunks that fit the model's sequence length, cutting between words
+        Returns (chunk text, token count) pairs
+        """
+        tokenizer = self.model.tokenizer
+        # Room for the [CLS]/[SEP] tokens the model adds; longer chunks would be truncated by the model
+        limit = self.model.max_seq_length - 2
+        if self.chunk_tokens:
+            limit = min(self.chunk_tokens, limit)
+        if not getattr(tokenizer, "is_fast", False):
+            # Offsets need a fast tokenizer; slow ones keep the model's truncation
+            return [(text, limit)]
+
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        offsets = encoding["offset_mapping"]
+        if len(offsets) <= limit:
+            return [(text, max(len(offsets), 1))]
+
+        word_ids = encoding.word_ids()
+        chunks = []
+        start = 0
+        while start < len(offsets) and len(chunks) < self.max_chunks:
+            end = min(start + limit, len(offsets))
+            # Back off to the start of a word split by the cut (unless the word alone exceeds the limit)
+            while end < len(offsets) and end > start + 1 and word_ids[end] == word_ids[end - 1]:
+                end -= 1
+            if end == start + 1 and limit > 1:
+                end = min(start + limit, len(offsets))
+            chunks.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+            start = end
+        return chunks
+
+    def _encode_chunked(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Encode texts of any length: long texts are split into chunks and the chunk embeddings pooled per text
+        Chunks of all texts are sorted by token count first, so each batch holds similar lengths and little padding
+        """
+        chunks, owners, lengths = [], [], []
+        for owner, text in enumerate(texts):
+            for chunk, length in self._chunk(text):
+                chunks.append(chunk)
+                owners.append(owner)
+                lengths.append(length)
+
+        order = np.argsort(lengths, kind="stable")
+        encoded = self.model.encode([chunks[i] for i in order], batch_size=batch_size, convert_to_numpy=True)
+        chunk_embeddings = np.empty_like(encoded)
+        chunk_embeddings[order] = encoded
+        owners = np.asarray(owners)
+
+        if self.pooling == "max":
+            pooled = np.full((len(texts), chunk_embeddings.shape[1]), -np.inf, dtype=np.float32)
+            np.maximum.at(pooled, owners, chunk_embeddings)
+            return pooled
 
+        weights = np.asarray(lengths, dtype=np.float32)
+        pooled = np.zeros((len(texts), chunk_embeddings.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, chunk_embeddings * weights[:, None])
+        return pooled / np.bincount(owners, weights=weights, minlength=len(texts))[:, None].astype(np.float32)
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache in a local SQLite file, keyed by (model_name, sha256(text))
+    Vectors are stored as raw float32 blobs; the least recently used rows are evicted past max_entries
+    """
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            max_entries: Rows kept at most (least recently used are deleted)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by worker threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_name TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_name, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name: str, texts: List[str], dimension: int) -> List[Optional[np.ndarray]]:
+        """
+        Look up embeddings for many texts in one query
+        Returns:
+            One float32 vector per text, or None where the text is not cached
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        unique = list(set(hashes))
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_name = ? "
+                    f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model_name, *chunk]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model_name = ? AND text_hash = ?",
+                    [(now, model_name, text_hash) for text_hash in found]
+                )
+                self._conn.commit()
+
+        results = []
+        for text_hash in hashes:
+            blob = found.get(text_hash)
+            if blob is None or len(blob) != dimension * 4:
+                results.append(None)
+            else:
+                results.append(np.frombuffer(blob, dtype=np.float32).copy())
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], embeddings: np.ndarray):
+        """Store embeddings for many texts in one transaction, then evict past max_entries"""
+        now = time.time()
+        rows = [
+            (model_name, self.text_hash(text), np.asarray(embedding, dtype=np.float32).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model_name, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._count += self._conn.total_changes - before
+
+            if self._count > self.max_entries:
+                # Evict down to 90% so eviction doesn't run on every insert
+                excess = self._count - int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE (model_name, text_hash) IN "
+                    "(SELECT model_name, text_hash FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
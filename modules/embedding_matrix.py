@@ -0,0 +1,127 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+class EmbeddingMatrix:
+    """Contiguous L2-normalized float32 embedding matrix with a resume_id row index"""
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 64):
+        """
+        Args:
+            dimension: Embedding dimension (inferred from the first embedding if None)
+            initial_capacity: Number of rows allocated up front (grows by doubling)
+        """
+        self.dimension = dimension
+        self._capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        # Raw (pre-normalization) norms, so zero embeddings can be told apart
+        self._norms: Optional[np.ndarray] = None
+        self._row_of: Dict[str, int] = {}
+        self._ids: List[str] = []
+        # Incremented on every change, lets caches derived from the matrix detect staleness
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, resume_id: str) -> bool:
+        return resume_id in self._row_of
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the backing arrays"""
+        if self._matrix is None:
+            return 0
+        return self._matrix.nbytes + self._norms.nbytes
+
+    def _ensure_capacity(self, rows: int):
+        """Allocate or grow the backing arrays to hold at least `rows` rows"""
+        if self._matrix is None:
+            self._capacity = max(self._capacity, rows)
+            self._matrix = np.zeros((self._capacity, self.dimension), dtype=np.float32)
+            self._norms = np.zeros(self._capacity, dtype=np.float32)
+            return
+
+        if rows <= self._capacity:
+            return
+
+        new_capacity = max(self._capacity * 2, rows)
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        norms = np.zeros(new_capacity, dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        norms[:len(self._ids)] = self._norms[:len(self._ids)]
+        self._matrix = matrix
+        self._norms = norms
+        self._capacity = new_capacity
+
+    def set(self, resume_id: str, embedding):
+        """Insert or overwrite the row for a resume (stored L2-normalized)"""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        if self.dimension is None:
+            self.dimension = vector.shape[0]
+        elif vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {vector.shape[0]} does not match matrix dimension {self.dimension}"
+            )
+
+        norm = float(np.linalg.norm(vector))
+        normalized = vector / norm if norm > 0 else np.zeros_like(vector)
+
+        row = self._row_of.get(resume_id)
+        if row is None:
+            self._ensure_capacity(len(self._ids) + 1)
+            row = len(self._ids)
+            self._row_of[resume_id] = row
+            self._ids.append(resume_id)
+        elif self._norms[row] == np.float32(norm) and np.array_equal(self._matrix[row], normalized):
+            return  # Unchanged, keep the version so derived caches stay valid
+
+        self._norms[row] = norm
+        self._matrix[row] = normalized
+        self.version += 1
+
+    def get(self, resume_id: str) -> Optional[np.ndarray]:
+        """Get the normalized embedding row for a resume (a view, do not modify)"""
+        row = self._row_of.get(resume_id)
+        if row is None:
+            return None
+        return self._matrix[row]
+
+    def get_raw(self, resume_id: str) -> Optional[np.ndarray]:
+        """Get a copy of a resume's embedding as it was set (normalized row times its norm)"""
+        row = self._row_of.get(resume_id)
+        if row is None:
+            return None
+        return self._matrix[row] * self._norms[row]
+
+    def remove(self, resume_id: str) -> bool:
+        """Remove a resume's row by moving the last row into its slot"""
+        row = self._row_of.pop(resume_id, None)
+        if row is None:
+            return False
+
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._norms[row] = self._norms[last]
+            self._ids[row] = moved_id
+            self._row_of[moved_id] = row
+        self._ids.pop()
+        self.version += 1
+        return True
+
+    def clear(self):
+        """Drop all rows (keeps the allocated arrays for reuse)"""
+        self._row_of.clear()
+        self._ids.clear()
+        self.version += 1
+
+    def view(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Get the populated part of the matrix
+        Returns (resume_ids, normalized matrix, raw norms); arrays are views, do not modify
+        """
+        n = len(self._ids)
+        if self._matrix is None:
+            return [], np.zeros((0, self.dimension or 0), dtype=np.float32), np.zeros(0, dtype=np.float32)
+        return list(self._ids), self._matrix[:n], self._norms[:n]
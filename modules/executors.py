@@ -0,0 +1,58 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request
+
+class WorkerPools:
+    """
+    Thread pool for CPU-bound work, so request handlers don't block the event loop
+    Concurrency is bounded by a semaphore; work still queued when the caller goes away is cancelled
+    """
+
+    def __init__(
+        self,
+        thread_workers: Optional[int] = None,
+        max_concurrent: Optional[int] = None
+    ):
+        """
+        Args:
+            thread_workers: Threads for work that releases the GIL or touches shared state
+                (embedding, ranking, clustering). Defaults to the CPU count, at most 4
+            max_concurrent: Maximum number of CPU tasks in flight (defaults to 2x thread_workers)
+        """
+        self.thread_workers = thread_workers or min(4, os.cpu_count() or 1)
+        self.max_concurrent = max_concurrent or 2 * self.thread_workers
+        self.thread_pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="cpu-worker")
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func on the thread pool"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.thread_pool, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """Stop the pool, cancelling work that has not started"""
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable, poll_interval: float = 0.5) -> Any:
+    """
+    Await work while watching the client connection
+    If the client disconnects first, the work is cancelled (tasks still queued never start)
+    and a 499 is raised so the handler stops
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
@@ -0,0 +1,81 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+@lru_cache(maxsize=1 << 18)
+def _token_bucket(token: str, dimension: int, key: bytes) -> Tuple[int, float]:
+    """Bucket and sign of a token (blake2b with a fixed key: the same in every process and restart)"""
+    value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8, key=key).digest(), "little")
+    return value % dimension, 1.0 if value >> 63 else -1.0
+
+class HashingEmbedder:
+    """
+    Model-free embeddings: signed feature hashing of word counts with sublinear TF weighting
+    Deterministic across processes and restarts, and fast enough to embed a whole session per request;
+    also usable offline (tests, benchmarks) where no model can be downloaded
+    """
+
+    # Same interface as Embedder, which is always ready
+    loaded = True
+
+    def __init__(self, dimension: int = 384, seed: int = 0):
+        """
+        Args:
+            dimension: Embedding size (number of hash buckets)
+            seed: Hash key; embeddings are only comparable between embedders with the same seed and dimension
+        """
+        self.dimension = dimension
+        self.seed = seed
+        self._key = seed.to_bytes(8, "little")
+        self.model_name = "hashing"
+        self.model_id = f"hashing-blake2b-{dimension}-{seed}"
+
+    def wait_until_loaded(self, timeout=None) -> bool:
+        return True
+
+    def embed(self, text: str) -> np.ndarray:
+        """Generate embedding for given text (a zero vector for empty text)"""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embed many texts at once: token counts of the whole batch are projected with one bincount
+        Returns an array of shape (len(texts), dimension) with L2-normalized rows (zero rows for texts without words)
+        Args:
+            batch_size: Unused, accepted for compatibility with Embedder
+        """
+        token_lists = [TOKEN_PATTERN.findall(text.lower()) if text else [] for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(texts))
+        if not lengths.sum():
+            return np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        # Token IDs from a dict: a fixed-width string array would be sized by the longest token
+        vocabulary: Dict[str, int] = {}
+        token_ids = np.fromiter(
+            (vocabulary.setdefault(token, len(vocabulary)) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        buckets_and_signs = [_token_bucket(token, self.dimension, self._key) for token in vocabulary]
+        buckets = np.fromiter((bucket for bucket, _ in buckets_and_signs), dtype=np.int64, count=len(vocabulary))
+        signs = np.fromiter((sign for _, sign in buckets_and_signs), dtype=np.float64, count=len(vocabulary))
+
+        # Term frequency of every (text, token) pair
+        doc_ids = np.repeat(np.arange(len(texts)), lengths)
+        pairs, counts = np.unique(doc_ids * len(vocabulary) + token_ids, return_counts=True)
+        pair_docs, pair_tokens = np.divmod(pairs, len(vocabulary))
+
+        weights = (1.0 + np.log(counts)) * signs[pair_tokens]
+        embeddings = np.bincount(
+            pair_docs * self.dimension + buckets[pair_tokens],
+            weights=weights,
+            minlength=len(texts) * self.dimension
+        ).reshape(len(texts), self.dimension)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.maximum(norms, 1e-8)).astype(np.float32)
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from modules.text_analyzer import TextAnalyzer
+from modules.embedder import Embedder
+
+class JobRegistry:
+    """Bounded LRU of analyzed job description profiles, so each JD is analyzed and embedded once"""
+
+    def __init__(self, text_analyzer: TextAnalyzer, embedder: Embedder, max_jobs: int = 256):
+        """
+        Args:
+            text_analyzer: Analyzer producing processed text, skills and category
+            embedder: Embedder for the processed job description
+            max_jobs: Maximum number of profiles kept (least recently used are dropped)
+        """
+        self.text_analyzer = text_analyzer
+        self.embedder = embedder
+        self.max_jobs = max_jobs
+        # Structure: {job_id: profile}, most recently used last
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        # Structure: {sha256(job_description): job_id} - reuses profiles for identical JD text
+        self._job_ids_by_text: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _text_hash(job_description: str) -> str:
+        return hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+
+    def create(self, job_description: str) -> Dict:
+        """
+        Analyze a job description into a profile and register it
+        Identical job description text returns the existing profile
+        """
+        text_hash = self._text_hash(job_description)
+        with self._lock:
+            job_id = self._job_ids_by_text.get(text_hash)
+            if job_id is not None:
+                self._profiles.move_to_end(job_id)
+                return self._profiles[job_id]
+
+        analysis = self.text_analyzer.analyze(job_description)
+        embedding = np.asarray(self.embedder.embed(analysis["processed_text"]), dtype=np.float32)
+        profile = {
+            "job_id": str(uuid.uuid4()),
+            "job_description": job_description,
+            "processed_text": analysis["processed_text"],
+            "embedding": embedding,
+            "skills": analysis["skills"],
+            "category": analysis["category"],
+            "created_at": datetime.now().isoformat()
+        }
+
+        with self._lock:
+            # Another request may have registered the same text meanwhile
+            job_id = self._job_ids_by_text.get(text_hash)
+            if job_id is not None:
+                self._profiles.move_to_end(job_id)
+                return self._profiles[job_id]
+
+            self._profiles[profile["job_id"]] = profile
+            self._job_ids_by_text[text_hash] = profile["job_id"]
+            while len(self._profiles) > self.max_jobs:
+                _, evicted = self._profiles.popitem(last=False)
+                self._job_ids_by_text.pop(self._text_hash(evicted["job_description"]), None)
+        return profile
+
+    def embedding_for(self, profile: Dict, embedder) -> np.ndarray:
+        """A profile's embedding from another embedder (e.g. hashing mode), computed once and kept with the profile"""
+        if embedder is self.embedder:
+            return profile["embedding"]
+        with self._lock:
+            embedding = profile.setdefault("embeddings", {}).get(embedder.model_id)
+        if embedding is None:
+            embedding = np.asarray(embedder.embed(profile["processed_text"]), dtype=np.float32)
+            with self._lock:
+                profile["embeddings"][embedder.model_id] = embedding
+        return embedding
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a profile by job ID (None if unknown or evicted)"""
+        with self._lock:
+            profile = self._profiles.get(job_id)
+            if profile is not None:
+                self._profiles.move_to_end(job_id)
+            return profile
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a profile. Returns True if deleted, False if not found"""
+        with self._lock:
+            profile = self._profiles.pop(job_id, None)
+            if profile is None:
+                return False
+            self._job_ids_by_text.pop(self._text_hash(profile["job_description"]), None)
+            return True
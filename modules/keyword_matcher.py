@@ -0,0 +1,125 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher built on an Aho-Corasick automaton
+    Finds every keyword in a single pass over the text, so the scan cost depends on
+    the text length rather than on the number of keywords
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        # Trie transitions, failure links and keyword ids ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self.keywords: List[str] = []
+        self._keyword_ids: Dict[str, int] = {}
+        # Whether each keyword starts / ends with a word character (only those edges need a boundary)
+        self._word_edges: List[Tuple[bool, bool]] = []
+        self._built = True
+        self.add_keywords(keywords)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    @staticmethod
+    def _is_word_char(ch: str) -> bool:
+        return ch.isalnum() or ch == "_"
+
+    def add_keywords(self, keywords: Iterable[str]):
+        """Add keywords to the automaton (duplicates and empty strings are ignored)"""
+        for keyword in keywords:
+            if not keyword or keyword in self._keyword_ids:
+                continue
+
+            keyword_id = len(self.keywords)
+            self.keywords.append(keyword)
+            self._keyword_ids[keyword] = keyword_id
+            self._word_edges.append((self._is_word_char(keyword[0]), self._is_word_char(keyword[-1])))
+
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+            self._built = False
+
+    def _build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        # Outputs may hold merged ids from an earlier build, so start from the trie ends again
+        for state in range(len(self._output)):
+            self._output[state] = []
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                state = self._goto[state][ch]
+            self._output[state].append(keyword_id)
+
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                # A match of the longer keyword also ends every keyword on its failure chain
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+        self._built = True
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        Count keyword occurrences in text
+        A keyword edge that is a word character (letter, digit or underscore) must not be directly
+        next to another word character, so "java" does not match inside "javascript"
+        Edges like the "+" of "c++" need no boundary, so "c++", "c++11", "c#8" and "node.js" all match
+        """
+        if not self._built:
+            self._build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        keywords = self.keywords
+        word_edges = self._word_edges
+        is_word_char = self._is_word_char
+        counts: Dict[int, int] = {}
+        last = len(text) - 1
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            if output[state]:
+                word_after = i < last and is_word_char(text[i + 1])
+                for keyword_id in output[state]:
+                    word_start, word_end = word_edges[keyword_id]
+                    # Word boundary after the match
+                    if word_end and word_after:
+                        continue
+                    # Word boundary before the match
+                    start = i - len(keywords[keyword_id])
+                    if word_start and start >= 0 and is_word_char(text[start]):
+                        continue
+                    counts[keyword_id] = counts.get(keyword_id, 0) + 1
+
+        return {keywords[keyword_id]: n for keyword_id, n in counts.items()}
+
+    def find(self, text: str) -> Set[str]:
+        """Get the set of keywords that occur in text"""
+        return set(self.count(text))
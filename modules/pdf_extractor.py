@@ -1,37 +1,449 @@
+import asyncio
+import io
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unicodedata
+import uuid
 import PyPDF2
 import pdfplumber
-from typing import Optional
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, Tuple, Union
+
+# A PDF given as a file path, raw bytes or a seekable binary file object
+PDFSource = Union[str, bytes, BinaryIO]
+
+# Extraction engines, fastest first
+ENGINES = ("pypdf2", "pdfplumber")
+
+# Quality heuristic thresholds (per page range)
+MIN_CHARS_PER_PAGE = 40  # Fewer non-whitespace characters means scanned/garbled pages
+MIN_VALID_CHAR_RATIO = 0.9  # Share of characters that are not replacement/control/private-use glyphs
+MAX_MEAN_WORD_LENGTH = 15  # Longer "words" mean the engine dropped the spaces between them
+
+# Larger file objects reach worker processes as a temporary file instead of in-memory bytes
+MAX_INLINE_BYTES = 1024 * 1024
+
+# Seconds past the deadline allowed for a page already in progress before a worker counts as hung
+DEADLINE_GRACE = 1.0
+
+# Seconds between checks for tasks running past their deadline
+HANG_CHECK_INTERVAL = 0.25
+
+# Times a task is submitted when the pool it ran on is recycled for another document's hung task
+MAX_TASK_ATTEMPTS = 3
+
+# Deadlines of tasks running in this worker process's pool, by task ID (a Manager dict set by _init_worker)
+_task_deadlines = None
+
+def _init_worker(task_deadlines):
+    """Process pool initializer: where tasks report their deadline when they start running"""
+    global _task_deadlines
+    _task_deadlines = task_deadlines
+
+def _report_start(task_id: Optional[str], deadline: Optional[float]):
+    """Tell the parent a task has started (until then it is only queued and can't be hung)"""
+    if _task_deadlines is not None and task_id is not None and deadline is not None:
+        _task_deadlines[task_id] = deadline
+
+def _open(source: PDFSource, engine: str):
+    """Open a PDF with the given engine (file objects are rewound first)"""
+    if not isinstance(source, str):
+        source.seek(0)
+    if engine == "pdfplumber":
+        return pdfplumber.open(source)
+    return PyPDF2.PdfReader(source)
+
+def count_pages(source: PDFSource) -> int:
+    """Count pages, trying each engine in turn (0 if none can open the PDF)"""
+    for engine in ENGINES:
+        try:
+            document = _open(source, engine)
+            try:
+                return len(document.pages)
+            finally:
+                if engine == "pdfplumber":
+                    document.close()
+        except Exception as e:
+            print(f"{engine} could not open PDF: {e}")
+    return 0
+
+def is_usable_text(text: str, page_count: int) -> bool:
+    """
+    Cheap text-quality check used to decide whether to escalate to a slower engine
+    Fails on near-empty pages, undecoded glyphs (e.g. "(cid:12)", U+FFFD) and run-together words
+    """
+    characters = "".join(text.split())
+    if len(characters) < MIN_CHARS_PER_PAGE * max(page_count, 1):
+        return False
+    if "(cid:" in text:
+        return False
+
+    invalid = sum(1 for c in characters if c == "\ufffd" or unicodedata.category(c) in ("Cc", "Co", "Cn", "Cs"))
+    if 1 - invalid / len(characters) < MIN_VALID_CHAR_RATIO:
+        return False
+
+    words = text.split()
+    return len(characters) / len(words) <= MAX_MEAN_WORD_LENGTH
+
+def _valid_length(text: str) -> int:
+    """Number of non-whitespace characters, used to pick the best of several poor extractions"""
+    return len("".join(text.split())) - text.count("\ufffd")
+
+def extract_page_range(
+    source: PDFSource,
+    start: int,
+    end: int,
+    engines: Tuple[str, ...] = ENGINES,
+    time_budget: Optional[float] = None,
+    task_id: Optional[str] = None
+) -> Dict:
+    """
+    Extract pages [start, end) trying engines in order until one passes the quality check
+    Module-level (picklable) so page ranges of one document can run on a process pool
+    Stops between pages once `time_budget` seconds have passed since the task started
+
+    Returns:
+        Dictionary with page texts, the engine used and whether the range was cut short
+    """
+    deadline = time.time() + time_budget if time_budget is not None else None
+    _report_start(task_id, deadline)
+    return _extract_pages(source, start, end, engines, deadline)
+
+def _extract_pages(source: PDFSource, start: int, end: int, engines: Tuple[str, ...], deadline: Optional[float]) -> Dict:
+    """extract_page_range up to a deadline (a time.time() timestamp)"""
+    best = {"pages": [], "engine": engines[0], "truncated": False}
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    for engine in engines:
+        pages: List[str] = []
+        truncated = False
+        try:
+            document = _open(source, engine)
+            try:
+                for page_number in range(start, end):
+                    if deadline is not None and time.time() > deadline:
+                        truncated = True
+                        break
+                    pages.append(document.pages[page_number].extract_text() or "")
+            finally:
+                if engine == "pdfplumber":
+                    document.close()
+        except Exception as e:
+            print(f"{engine} failed on pages {start}-{end}: {e}")
+
+        result = {"pages": pages, "engine": engine, "truncated": truncated}
+        text = "\n".join(pages)
+        if truncated or is_usable_text(text, len(pages)):
+            return result
+        if _valid_length(text) > _valid_length("\n".join(best["pages"])):
+            best = result
+        if deadline is not None and time.time() > deadline:
+            break
+
+    return best
+
+def extract_document(
+    source: PDFSource,
+    max_pages: int,
+    first_pages: int,
+    engines: Tuple[str, ...] = ENGINES,
+    time_budget: Optional[float] = None,
+    task_id: Optional[str] = None
+) -> Dict:
+    """
+    Count a document's pages and extract its first pages in one task
+    Short documents need nothing more; longer ones have the rest extracted by extract_page_range
+    with what is left of the time budget
+
+    Returns:
+        extract_page_range's result for pages [0, min(first_pages, max_pages)) plus page_count
+        and the seconds the task took
+    """
+    started = time.time()
+    deadline = started + time_budget if time_budget is not None else None
+    _report_start(task_id, deadline)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    page_count = count_pages(source)
+    end = min(page_count, max_pages, first_pages)
+    result = _extract_pages(source, 0, end, engines, deadline) if end else {
+        "pages": [], "engine": engines[0], "truncated": False
+    }
+    return {**result, "page_count": page_count, "seconds": time.time() - started}
 
 class PDFExtractor:
     """Extract text from PDF files"""
-    
-    def extract_text(self, file_path: str) -> str:
+
+    def __init__(
+        self,
+        engine: str = "auto",
+        max_pages: int = 50,
+        time_budget: float = 20.0,
+        pages_per_chunk: int = 4,
+        process_workers: int = 0
+    ):
         """
-        Extract text from PDF using multiple methods for better accuracy
+        Args:
+            engine: "auto" (PyPDF2, escalating to pdfplumber when the text looks poor),
+                "pypdf2" or "pdfplumber" (each still falls back to the other if it yields poor text)
+            max_pages: Pages extracted per document at most (later pages are skipped)
+            time_budget: Seconds of extraction per document, not counting time spent waiting for a worker;
+                pages not reached in time are skipped
+            pages_per_chunk: Documents with at most this many pages are extracted by one task;
+                the rest of longer ones is split over the worker processes
+            process_workers: Processes extracting PDFs (0 extracts on a thread of the caller)
+                The extractor owns this pool so it can kill workers stuck past the time budget
         """
-        text = ""
-        
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            print(f"pdfplumber failed: {e}")
-        
-        # Fallback to PyPDF2 if pdfplumber didn't work
-        if not text.strip():
+        if engine not in ("auto",) + ENGINES:
+            raise ValueError(f"Unknown PDF engine: {engine}")
+        self.engines = ENGINES if engine in ("auto", "pypdf2") else tuple(reversed(ENGINES))
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.pages_per_chunk = max(1, pages_per_chunk)
+        self.process_workers = process_workers
+        self._pool_lock = threading.Lock()
+        self._manager = None
+        self._pool = None
+        if process_workers > 0:
+            # spawn, not fork: the parent holds model threads that must not be copied mid-operation
+            self._context = multiprocessing.get_context("spawn")
+            # Running tasks' deadlines by task ID; the server process outlives recycled pools
+            self._manager = self._context.Manager()
+            self._task_deadlines = self._manager.dict()
+            self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.process_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._task_deadlines,)
+        )
+
+    def _recycle_pool(self, pool: ProcessPoolExecutor):
+        """
+        Kill the workers of a pool with a task stuck past its deadline and replace the pool
+        A running task can't be cancelled, so this is the only way to free the worker; the other
+        tasks on the old pool fail with it and are resubmitted by their documents (see _run_tasks)
+        """
+        with self._pool_lock:
+            if self._pool is not pool:
+                return  # Another request already replaced it
+            self._pool = self._new_pool()
+        print("PDF extraction exceeded its time budget, restarting the extraction processes")
+        # ProcessPoolExecutor has no public API to stop running tasks
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the extraction processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+    def extract(self, source: PDFSource) -> Dict:
+        """Blocking version of extract_async, for callers without an event loop"""
+        return asyncio.run(self.extract_async(source))
+
+    async def extract_async(self, source: PDFSource) -> Dict:
+        """
+        Extract text from a PDF within the page and time caps
+        The PDF can be a path, bytes or a file-like object, so uploads need no temp file
+        Only waits on the event loop: the parsing happens on worker processes (or a thread without them)
+
+        Returns:
+            Dictionary with text, engine ("pypdf2", "pdfplumber" or "mixed"), page counts,
+            whether pages were skipped and elapsed_ms
+        """
+        started = time.perf_counter()
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+
+        if self._pool is not None:
+            results, page_count = await self._extract_in_pool(source)
+        else:
+            results, page_count = await self._extract_in_thread(source)
+
+        pages = [page for result in results for page in result["pages"]]
+        text = "\n".join(page for page in pages if page).strip()
+        if not text:
+            name = source if isinstance(source, str) else "uploaded file"
+            raise ValueError(f"Could not extract text from PDF: {name}")
+
+        engines_used = {result["engine"] for result in results if result["pages"]}
+        return {
+            "text": text,
+            "engine": engines_used.pop() if len(engines_used) == 1 else "mixed",
+            "page_count": page_count,
+            "pages_extracted": len(pages),
+            "truncated": len(pages) < page_count,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    async def _extract_in_thread(self, source: PDFSource) -> Tuple[List[Dict], int]:
+        """
+        Extract without processes, on a daemon thread that is waited for until its deadline
+        A parse hung past it can't be killed, only abandoned, so process_workers is preferred
+        """
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+
+        def run():
+            result = None
             try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
+                result = extract_document(source, self.max_pages, self.max_pages, self.engines, self.time_budget)
             except Exception as e:
-                print(f"PyPDF2 failed: {e}")
-        
-        if not text.strip():
-            raise ValueError(f"Could not extract text from PDF: {file_path}")
-        
-        return text.strip()
+                print(f"PDF extraction failed: {e}")
+            loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(result))
+
+        threading.Thread(target=run, name="pdf-extractor", daemon=True).start()
+        done, _ = await asyncio.wait({finished}, timeout=self.time_budget + DEADLINE_GRACE)
+        result = finished.result() if done else None
+        if result is None:
+            return [], 0
+        return [result], result["page_count"]
+
+    async def _extract_in_pool(self, source: PDFSource) -> Tuple[List[Dict], int]:
+        """
+        Extract on the process pool: one task counts pages and extracts the first pages_per_chunk pages
+        (all of a typical resume); the rest of a longer document is split into one range per worker
+        """
+        data = await asyncio.to_thread(self._task_source, source)
+        try:
+            return await self._extract_document(data)
+        finally:
+            if data is not source and isinstance(data, str):
+                os.unlink(data)
+
+    async def _extract_document(self, data: PDFSource) -> Tuple[List[Dict], int]:
+        """Run the first task, then the remaining page ranges of a longer document; returns results and page count"""
+        head = await self._run_tasks([
+            (extract_document, (data, self.max_pages, self.pages_per_chunk, self.engines, self.time_budget))
+        ])
+        if not head:
+            return [], 0
+        results = head
+        page_count = head[0]["page_count"]
+        # Time budgets run only while a task runs, so pages queued behind other documents still get theirs
+        time_budget = max(0.0, self.time_budget - head[0]["seconds"])
+
+        pages_to_extract = min(page_count, self.max_pages)
+        remaining = pages_to_extract - self.pages_per_chunk
+        if remaining > 0 and not head[0]["truncated"]:
+            size = math.ceil(remaining / min(self.process_workers, math.ceil(remaining / self.pages_per_chunk)))
+            results += await self._run_tasks([
+                (extract_page_range, (data, start, min(start + size, pages_to_extract), self.engines, time_budget))
+                for start in range(self.pages_per_chunk, pages_to_extract, size)
+            ])
+        return results, page_count
+
+    def _task_source(self, source: PDFSource) -> PDFSource:
+        """
+        What a worker process is given to read the PDF from (file objects can't cross a process boundary)
+        Small files are passed as bytes; larger ones are copied in chunks to a temporary file the caller deletes
+        """
+        if isinstance(source, str):
+            return source
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(0)
+        if size <= MAX_INLINE_BYTES:
+            return source.read()
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            shutil.copyfileobj(source, f)
+        source.seek(0)
+        return f.name
+
+    async def _run_tasks(self, tasks: List[Tuple[Callable, Tuple]]) -> List[Dict]:
+        """
+        Run (function, args) tasks on the pool; results in order, up to the first missing or truncated one
+        Tasks lost to a pool recycled for another document's hung task are resubmitted to the new pool
+        """
+        outcomes: List[Optional[Dict]] = [None] * len(tasks)
+        pending = list(range(len(tasks)))
+        for _ in range(MAX_TASK_ATTEMPTS):
+            if not pending:
+                break
+            pool = self._pool
+            if pool is None:
+                break  # Shut down
+            submitted: Dict[int, Tuple[str, Future]] = {}
+            for index in pending:
+                function, args = tasks[index]
+                task_id = uuid.uuid4().hex
+                try:
+                    submitted[index] = (task_id, pool.submit(function, *args, task_id=task_id))
+                except Exception as e:
+                    # The pool was recycled since it was read; retried on the new one
+                    print(f"Could not submit PDF extraction: {e}")
+                    break
+            retry = [index for index in pending if index not in submitted]
+            try:
+                hung = await self._watch(pool, dict(submitted.values()))
+            finally:
+                for task_id, _ in submitted.values():
+                    self._task_deadlines.pop(task_id, None)
+
+            for index, (task_id, future) in submitted.items():
+                if task_id in hung:
+                    continue  # The document that hung: not tried again
+                if future.cancelled() or isinstance(future.exception(), BrokenProcessPool):
+                    retry.append(index)
+                elif future.exception() is not None:
+                    print(f"Page range extraction failed: {future.exception()}")
+                else:
+                    outcomes[index] = future.result()
+            pending = sorted(retry)
+
+        results = []
+        for outcome in outcomes:
+            if outcome is None:
+                break  # Keep pages contiguous: nothing after a missing range is used
+            results.append(outcome)
+            if outcome["truncated"]:
+                break
+        return results
+
+    async def _watch(self, pool: ProcessPoolExecutor, futures: Dict[str, Future]) -> Set[str]:
+        """
+        Wait for pool futures by task ID, recycling the pool if one runs past its deadline
+        Only started tasks have a deadline, so time spent queued behind other documents never counts
+        Returns the IDs of the tasks that hung
+        """
+        waiting = {asyncio.wrap_future(future): task_id for task_id, future in futures.items()}
+        hung: Set[str] = set()
+        while waiting:
+            done, _ = await asyncio.wait(waiting, timeout=HANG_CHECK_INTERVAL)
+            for future in done:
+                del waiting[future]
+                if not future.cancelled():
+                    future.exception()  # Handled on the concurrent future by _run_tasks
+            if not waiting or hung:
+                continue  # Once recycled, the remaining futures fail shortly
+
+            # Workers stop between pages at the deadline; the grace covers a page already in progress
+            deadlines = self._task_deadlines.copy()
+            now = time.time()
+            hung = {
+                task_id for task_id in waiting.values()
+                if task_id in deadlines and now > deadlines[task_id] + DEADLINE_GRACE
+            }
+            if hung:
+                self._recycle_pool(pool)
+        return hung
 
+    def extract_text(self, source: PDFSource) -> str:
+        """Extract text from PDF (see extract for engine selection and limits)"""
+        return self.extract(source)["text"]
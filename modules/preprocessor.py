@@ -1,6 +1,12 @@
 import re
 import string
 
+# Compiled once and shared by every call
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+# Special characters (anything but word chars, whitespace and basic punctuation) and whitespace runs
+SEPARATOR_PATTERN = re.compile(r'(?:[^\w\s\.\,\;\!\?\-\:]|\s)+')
+
 class TextPreprocessor:
     """Preprocess and clean text for embedding generation"""
     
@@ -12,22 +18,23 @@ class TextPreprocessor:
             return ""
         
         # Convert to lowercase
-        text = text.lower()
-        
+        return self.clean(text.lower())
+    
+    def clean(self, text_lower: str) -> str:
+        """
+        Clean text that is already lowercased
+        Lets callers that lowercase a document once share it with other analysis steps
+        """
         # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = URL_PATTERN.sub('', text_lower)
         
         # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
-        
-        # Remove special characters but keep spaces and punctuation for readability
-        text = re.sub(r'[^\w\s\.\,\;\!\?\-\:]', ' ', text)
+        text = EMAIL_PATTERN.sub('', text)
         
-        # Replace multiple whitespaces with single space
-        text = re.sub(r'\s+', ' ', text)
+        # Replace special characters (keeping basic punctuation) and whitespace runs with a single space
+        text = SEPARATOR_PATTERN.sub(' ', text)
         
         # Remove extra spaces
         text = text.strip()
         
         return text
-
@@ -0,0 +1,78 @@
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+class Int8Quantizer:
+    """
+    Dynamic int8 quantization of a sentence-transformers model's linear layers for CPU inference
+    Weights are stored as int8 and activations are quantized on the fly, so no calibration data is needed;
+    the result is validated against the float model and rejected if its embeddings drift too far
+    """
+
+    # Resume and job description snippets used when no validation set is given
+    DEFAULT_VALIDATION_TEXTS = (
+        "Senior software engineer with 8 years of experience in Python, Django and PostgreSQL",
+        "Data scientist skilled in machine learning, pandas, scikit-learn and deep learning with PyTorch",
+        "Frontend developer building responsive web applications with React, TypeScript and CSS",
+        "DevOps engineer experienced with AWS, Docker, Kubernetes, Terraform and CI/CD pipelines",
+        "Registered nurse with intensive care experience, patient assessment and medication administration",
+        "Accountant responsible for financial reporting, audits, tax preparation and budgeting",
+        "Marketing manager leading SEO, content strategy, social media campaigns and analytics",
+        "Mobile developer shipping Flutter and Kotlin apps to the App Store and Google Play",
+        "We are hiring a backend engineer to design REST APIs and scale our microservices",
+        "Project manager with Agile and Scrum certification coordinating cross-functional teams"
+    )
+
+    def __init__(self, max_drift: float = 0.02, validation_texts: Optional[Sequence[str]] = None):
+        """
+        Args:
+            max_drift: Largest accepted drift, 1 - the lowest cosine similarity between
+                       float and int8 embeddings of the same validation text
+            validation_texts: Texts to validate on (defaults to DEFAULT_VALIDATION_TEXTS)
+        """
+        self.max_drift = max_drift
+        self.validation_texts: List[str] = list(validation_texts or self.DEFAULT_VALIDATION_TEXTS)
+
+    @staticmethod
+    def quantize(model: torch.nn.Module) -> torch.nn.Module:
+        """Quantized copy of the model (its nn.Linear layers become dynamic int8 layers)"""
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def drift(self, reference, candidate, batch_size: int = 32) -> Dict:
+        """
+        Compare two models' embeddings of the validation texts
+        Returns:
+            Dictionary with mean/min cosine similarity, drift, largest absolute difference and encode timings
+        """
+        started = time.perf_counter()
+        expected = reference.encode(self.validation_texts, batch_size=batch_size, convert_to_numpy=True)
+        reference_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        actual = candidate.encode(self.validation_texts, batch_size=batch_size, convert_to_numpy=True)
+        candidate_seconds = time.perf_counter() - started
+
+        norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+        cosines = np.sum(expected * actual, axis=1) / np.maximum(norms, 1e-12)
+        return {
+            "texts": len(self.validation_texts),
+            "mean_cosine": float(cosines.mean()),
+            "min_cosine": float(cosines.min()),
+            "drift": float(1.0 - cosines.min()),
+            "max_abs_diff": float(np.abs(expected - actual).max()),
+            "float_encode_seconds": reference_seconds,
+            "int8_encode_seconds": candidate_seconds
+        }
+
+    def apply(self, model, batch_size: int = 32) -> Tuple[Optional[torch.nn.Module], Dict]:
+        """
+        Quantize and validate a model
+        Returns:
+            (quantized model, drift report), or (None, report) if the drift exceeds max_drift
+        """
+        quantized = self.quantize(model)
+        report = self.drift(model, quantized, batch_size=batch_size)
+        report["max_drift"] = self.max_drift
+        report["accepted"] = report["drift"] <= self.max_drift
+        return (quantized if report["accepted"] else None), report
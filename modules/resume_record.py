@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+class ResumeRecord:
+    """
+    Compact stored resume (slots, no per-instance dict)
+    The embedding is not kept here: it lives as a float32 row of the session's embedding matrix
+    and is only converted to a list when a response needs it (see to_dict)
+    """
+
+    __slots__ = (
+        "resume_id",
+        "filename",
+        "text",
+        "processed_text",
+        "similarity_score",
+        "skills",
+        "category",
+        "cluster_label",
+        "uploaded_at",
+        "processed_at",
+        "semantic_similarity",
+        "skill_coverage",
+        "skill_gate_passed",
+        "flag"
+    )
+
+    # Fields only present in responses once a resume has been scored
+    OPTIONAL_FIELDS = ("processed_at", "semantic_similarity", "skill_coverage", "skill_gate_passed", "flag")
+    # Every field a response can contain
+    RESPONSE_FIELDS = (
+        "resume_id", "filename", "text", "processed_text", "similarity_score", "skills",
+        "category", "cluster_label", "embedding", "uploaded_at"
+    ) + OPTIONAL_FIELDS
+    # Fields returned unless a projection asks for more (full text and embeddings are large)
+    DEFAULT_FIELDS = tuple(
+        field for field in RESPONSE_FIELDS if field not in ("text", "processed_text", "embedding")
+    )
+
+    def __init__(
+        self,
+        resume_id: str,
+        filename: str,
+        text: str,
+        uploaded_at: str,
+        processed_text: Optional[str] = None,
+        similarity_score: float = 0.0,
+        skills: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        cluster_label: int = 0
+    ):
+        self.resume_id = resume_id
+        self.filename = filename
+        self.text = text
+        self.processed_text = processed_text
+        self.similarity_score = similarity_score
+        self.skills = skills if skills is not None else []
+        self.category = category
+        self.cluster_label = cluster_label
+        self.uploaded_at = uploaded_at
+        self.processed_at = None
+        self.semantic_similarity = None
+        self.skill_coverage = None
+        self.skill_gate_passed = None
+        self.flag = None
+
+    def update(self, **fields):
+        """Set several fields at once (unknown field names raise AttributeError)"""
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def to_dict(self, embedding: Optional[np.ndarray] = None, fields: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Convert to the JSON response shape
+        Args:
+            embedding: The resume's embedding row, if the response should include it
+            fields: Fields to include (from RESPONSE_FIELDS); None includes all of them
+        """
+        record = {}
+        for name in fields if fields is not None else self.RESPONSE_FIELDS:
+            if name == "embedding":
+                record[name] = embedding.tolist() if embedding is not None else None
+                continue
+            value = getattr(self, name)
+            # Scoring fields are left out until the resume has been scored
+            if value is not None or name not in self.OPTIONAL_FIELDS:
+                record[name] = value
+        return record
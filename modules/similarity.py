@@ -72,6 +72,27 @@ class SimilarityCalculator:
         
         return float(similarity)
     
+    def cosine_similarities(self, matrix: np.ndarray, norms: np.ndarray, embedding: np.ndarray) -> np.ndarray:
+        """
+        Calculate cosine similarity between every row of a normalized matrix and one embedding
+        Same 0-1 scale as cosine_similarity, computed with a single matrix-vector product
+        
+        Args:
+            matrix: L2-normalized embeddings, one row per resume
+            norms: Raw norms of the rows (0 marks an all-zero embedding)
+            embedding: Query embedding (e.g. the job description)
+        """
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query_norm = np.linalg.norm(query)
+        
+        if query_norm == 0 or matrix.shape[0] == 0:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
+        
+        similarities = (matrix @ (query / query_norm) + 1) / 2
+        # Zero embeddings have no direction, match cosine_similarity and score them 0
+        similarities[norms == 0] = 0.0
+        return similarities
+    
     def calculate_final_score(
         self,
         semantic_similarity: float,
@@ -139,4 +160,75 @@ class SimilarityCalculator:
             "domain_penalty": domain_penalty,
             "flag": "; ".join(flags) if flags else None
         }
+    
+    def calculate_final_scores(
+        self,
+        semantic_similarities: np.ndarray,
+        resume_skills_list: List[List[str]],
+        jd_skills: List[str],
+        resume_categories: List[Optional[str]],
+        job_category: Optional[str] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_final_score over many resumes against one job description
+        
+        Args:
+            semantic_similarities: Cosine similarities (0-1), one per resume
+            resume_skills_list: Skills of each resume, aligned with semantic_similarities
+            jd_skills: List of skills from job description
+            resume_categories: Category of each resume (entries may be None)
+            job_category: Category of job description (optional)
+            
+        Returns:
+            Dictionary of arrays with the same keys as calculate_final_score ("flag" is a list)
+        """
+        semantic = np.asarray(semantic_similarities, dtype=np.float64)
+        
+        # Skill coverage, with the JD skill set built once for all resumes
+        jd_skills_set = {skill.lower() for skill in (jd_skills or [])}
+        if jd_skills_set:
+            skill_cov = np.array([
+                len({skill.lower() for skill in resume_skills} & jd_skills_set) / len(jd_skills_set)
+                for resume_skills in resume_skills_list
+            ], dtype=np.float64)
+            skill_gate_passed = skill_cov >= self.min_skill_overlap
+        else:
+            skill_cov = np.ones(len(semantic), dtype=np.float64)
+            skill_gate_passed = np.ones(len(semantic), dtype=bool)
+        
+        skill_penalty_multiplier = np.where(skill_gate_passed, 1.0, self.skill_penalty)
+        
+        # Domain mismatch penalty
+        domain_mismatch = np.array([
+            bool(category and job_category and category != job_category)
+            for category in resume_categories
+        ], dtype=bool)
+        domain_penalty = np.where(domain_mismatch, 0.2, 1.0)
+        
+        weighted_score = (0.7 * semantic) + (0.3 * skill_cov)
+        final_score = weighted_score * skill_penalty_multiplier * domain_penalty
+        
+        # Explainability flags, only formatted for resumes that need one
+        low_relevance = (semantic > 0.5) & (skill_cov < 0.1)
+        needs_flag = ~skill_gate_passed | low_relevance | domain_mismatch
+        flag_list: List[Optional[str]] = [None] * len(semantic)
+        for i in np.flatnonzero(needs_flag):
+            flags = []
+            if not skill_gate_passed[i]:
+                flags.append(f"Low skill overlap ({skill_cov[i]:.1%}) - {int((1 - skill_penalty_multiplier[i]) * 100)}% penalty applied")
+            if low_relevance[i]:
+                flags.append("High semantic similarity but low skill relevance")
+            if domain_mismatch[i]:
+                flags.append(f"Domain mismatch: {resume_categories[i]} vs {job_category}")
+            flag_list[i] = "; ".join(flags)
+        
+        return {
+            "final_score": final_score,
+            "semantic_similarity": semantic,
+            "skill_coverage": skill_cov,
+            "skill_gate_passed": skill_gate_passed,
+            "skill_penalty_applied": skill_penalty_multiplier < 1.0,
+            "domain_penalty": domain_penalty,
+            "flag": flag_list
+        }
 
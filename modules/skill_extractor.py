@@ -1,5 +1,6 @@
-import re
-from typing import List
+from typing import Dict, Iterable, List, Optional
+
+from modules.keyword_matcher import KeywordMatcher
 
 class SkillExtractor:
     """Extract skills from resume text"""
@@ -104,23 +105,49 @@ class SkillExtractor:
         'prometheus', 'grafana', 'jaeger', 'zipkin',
     ]
     
+    def __init__(self, skills: Optional[Iterable[str]] = None):
+        """
+        Build the skill matcher once
+        Args:
+            skills: Skill vocabulary to match (defaults to SKILL_KEYWORDS)
+        """
+        if skills is None:
+            skills = self.SKILL_KEYWORDS
+        self.skills = list(dict.fromkeys(skill.strip().lower() for skill in skills if skill.strip()))
+        self.skill_set = set(self.skills)
+        self.matcher = KeywordMatcher(self.skills)
+    
+    @classmethod
+    def from_file(cls, path: str, include_defaults: bool = True) -> "SkillExtractor":
+        """
+        Load an external skill taxonomy (one skill per line, '#' starts a comment)
+        Args:
+            path: Path to the taxonomy file
+            include_defaults: Also match the built-in SKILL_KEYWORDS
+        """
+        skills = list(cls.SKILL_KEYWORDS) if include_defaults else []
+        with open(path, encoding="utf-8") as taxonomy:
+            for line in taxonomy:
+                skill = line.split("#", 1)[0].strip()
+                if skill:
+                    skills.append(skill)
+        return cls(skills)
+    
     def extract_skills(self, resume_text: str) -> List[str]:
         """
         Extract skills from resume text using keyword matching
+        All skills are found in a single pass over the text
         """
         if not resume_text:
             return []
         
-        text_lower = resume_text.lower()
-        found_skills = []
-        
-        # Check for each skill keyword
-        for skill in self.SKILL_KEYWORDS:
-            # Use word boundaries for better matching
-            pattern = r'\b' + re.escape(skill) + r'\b'
-            if re.search(pattern, text_lower):
-                found_skills.append(skill.title())
+        return self.skills_from_counts(self.matcher.count(resume_text.lower()))
+    
+    def skills_from_counts(self, keyword_counts: Dict[str, int]) -> List[str]:
+        """
+        Build the skill list from keyword occurrence counts
+        Counts may include keywords of other analyzers, those are ignored
+        """
+        found_skills = {skill.title() for skill in keyword_counts if skill in self.skill_set}
         
-        # Remove duplicates and return
-        return sorted(list(set(found_skills)))
-
+        return sorted(found_skills)
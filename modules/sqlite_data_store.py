@@ -0,0 +1,421 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+import numpy as np
+
+from modules.resume_record import ResumeRecord
+
+# Ranking results written by update_scores, one column each
+SCORE_FIELDS = ("similarity_score", "semantic_similarity", "skill_coverage", "skill_gate_passed", "flag")
+
+class SQLiteDataStore:
+    """
+    Persistent data store for resumes and processing results with session isolation
+    Same interface as DataStore, backed by a SQLite file (WAL mode) so sessions survive restarts
+    Embeddings are stored as float32 BLOBs and each session's matrix is loaded with one query
+    sweep() deletes sessions idle longer than session_ttl and trims the in-memory matrix cache to max_bytes
+    """
+
+    def __init__(
+        self,
+        path: str = "./data/resumes.db",
+        session_ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            session_ttl: Seconds without any access after which a session is deleted (None keeps sessions)
+            max_bytes: Memory budget for cached session matrices (None for no limit); data stays on disk
+        """
+        self.path = path
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by worker threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resumes (
+                resume_id TEXT PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                text TEXT NOT NULL,
+                processed_text TEXT,
+                similarity_score REAL NOT NULL DEFAULT 0.0,
+                semantic_similarity REAL,
+                skill_coverage REAL,
+                skill_gate_passed INTEGER,
+                flag TEXT,
+                skills TEXT NOT NULL DEFAULT '[]',
+                category TEXT,
+                cluster_label INTEGER NOT NULL DEFAULT 0,
+                embedding BLOB,
+                uploaded_at TEXT NOT NULL,
+                processed_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS resumes_session ON resumes (session_id);
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                last_access REAL
+            );
+            """
+        )
+        self._migrate()
+        self._conn.commit()
+        self._lock = threading.RLock()
+        # Structure: {session_id: (version, resume_ids, matrix, norms)} - last loaded matrix per session
+        self._matrices: Dict[str, Tuple[int, List[str], np.ndarray, np.ndarray]] = {}
+        # Structure: {session_id: last access (epoch seconds)}, least recently used first
+        # Written to the sessions table by sweep(), so reads don't write to the database
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        # Called with the session ID after a session is deleted by sweep() (e.g. to drop derived caches)
+        self._eviction_listeners: List[Callable[[str], None]] = []
+
+    def _migrate(self):
+        """Bring databases created before session expiry up to the current schema"""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "last_access" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN last_access REAL")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO sessions (session_id, version) SELECT DISTINCT session_id, 0 FROM resumes"
+        )
+        self._conn.execute("UPDATE sessions SET last_access = ? WHERE last_access IS NULL", (time.time(),))
+
+    def _touch(self, session_id: str):
+        self._last_access[session_id] = time.time()
+        self._last_access.move_to_end(session_id)
+
+    def add_eviction_listener(self, listener: Callable[[str], None]):
+        """Register a callback run with the session ID of every session deleted by sweep()"""
+        self._eviction_listeners.append(listener)
+
+    def _bump_version(self, session_id: str):
+        """Mark the session's embedding set as changed (caller holds the lock and commits)"""
+        # A new row needs last_access, or sweep() could never expire it
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, version, last_access) VALUES (?, 1, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET version = version + 1",
+            (session_id, time.time())
+        )
+
+    @staticmethod
+    def _embedding_blob(embedding) -> Optional[bytes]:
+        if embedding is None:
+            return None
+        return np.asarray(embedding, dtype=np.float32).ravel().tobytes()
+
+    # Every column except the embedding, which is read only where it's needed
+    RECORD_COLUMNS = (
+        "resume_id, filename, text, processed_text, similarity_score, semantic_similarity, skill_coverage, "
+        "skill_gate_passed, flag, skills, category, cluster_label, uploaded_at, processed_at"
+    )
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> ResumeRecord:
+        """Convert a row to the record type returned by DataStore"""
+        record = ResumeRecord(
+            resume_id=row["resume_id"],
+            filename=row["filename"],
+            text=row["text"],
+            uploaded_at=row["uploaded_at"],
+            processed_text=row["processed_text"],
+            similarity_score=row["similarity_score"],
+            skills=json.loads(row["skills"]),
+            category=row["category"],
+            cluster_label=row["cluster_label"]
+        )
+        record.update(
+            processed_at=row["processed_at"],
+            semantic_similarity=row["semantic_similarity"],
+            skill_coverage=row["skill_coverage"],
+            skill_gate_passed=bool(row["skill_gate_passed"]) if row["skill_gate_passed"] is not None else None,
+            flag=row["flag"]
+        )
+        return record
+
+    def add_resume(self, session_id: str, filename: str, text: str, features: Optional[Dict] = None) -> str:
+        """
+        Add a new resume and return its ID (isolated by session)
+        Args:
+            features: Optional ingest features (processed_text, skills, category, embedding)
+        """
+        features = features or {}
+        resume_id = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, version, last_access) VALUES (?, 0, ?)",
+                (session_id, time.time())
+            )
+            self._touch(session_id)
+            self._conn.execute(
+                "INSERT INTO resumes (resume_id, session_id, filename, text, processed_text, skills, "
+                "category, cluster_label, embedding, uploaded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    resume_id,
+                    session_id,
+                    filename,
+                    text,
+                    features.get("processed_text"),
+                    json.dumps(list(features.get("skills") or [])),
+                    features.get("category"),
+                    features.get("cluster_label") or 0,
+                    self._embedding_blob(features.get("embedding")),
+                    datetime.now().isoformat()
+                )
+            )
+            if features.get("embedding") is not None:
+                self._bump_version(session_id)
+            self._conn.commit()
+        return resume_id
+
+    def update_resume_features(
+        self,
+        session_id: str,
+        resume_id: str,
+        processed_text: str,
+        skills: List[str],
+        category: Optional[str],
+        embedding,
+        cluster_label: Optional[int] = None
+    ):
+        """Store the text-derived features of a resume (computed once, at ingest)"""
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE resumes SET processed_text = ?, skills = ?, category = ?, embedding = COALESCE(?, embedding), "
+                "cluster_label = COALESCE(?, cluster_label) WHERE session_id = ? AND resume_id = ?",
+                (
+                    processed_text,
+                    json.dumps(list(skills)),
+                    category,
+                    self._embedding_blob(embedding),
+                    cluster_label,
+                    session_id,
+                    resume_id
+                )
+            ).rowcount
+            # Like DataStore, None keeps the stored embedding
+            if updated and embedding is not None:
+                self._bump_version(session_id)
+            self._conn.commit()
+
+    def get_resume(self, session_id: str, resume_id: str) -> Optional[ResumeRecord]:
+        """Get resume by ID (only if it belongs to the session)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.RECORD_COLUMNS} FROM resumes WHERE session_id = ? AND resume_id = ?",
+                (session_id, resume_id)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(session_id)
+        return self._to_record(row)
+
+    def get_embedding(self, session_id: str, resume_id: str) -> Optional[np.ndarray]:
+        """Get a copy of a resume's float32 embedding (None if it has none)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT embedding FROM resumes WHERE session_id = ? AND resume_id = ?",
+                (session_id, resume_id)
+            ).fetchone()
+        if row is None or row["embedding"] is None:
+            return None
+        return np.frombuffer(row["embedding"], dtype=np.float32).copy()
+
+    def update_resume_processing(
+        self,
+        session_id: str,
+        resume_id: str,
+        similarity_score: float,
+        skills: List[str],
+        cluster_label: int,
+        embedding
+    ):
+        """
+        Update resume with processing results (only if it belongs to the session)
+        Args:
+            embedding: New embedding for the resume, or None to keep the stored one
+        """
+        blob = self._embedding_blob(embedding)
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE resumes SET similarity_score = ?, skills = ?, cluster_label = ?, "
+                "embedding = COALESCE(?, embedding), processed_at = ? WHERE session_id = ? AND resume_id = ?",
+                (
+                    float(similarity_score),
+                    json.dumps(list(skills)),
+                    int(cluster_label),
+                    blob,
+                    datetime.now().isoformat(),
+                    session_id,
+                    resume_id
+                )
+            ).rowcount
+            if updated and blob is not None:
+                self._bump_version(session_id)
+            self._conn.commit()
+
+    def update_scores(self, session_id: str, scores: Dict[str, Dict]):
+        """
+        Bulk write-back of ranking results in one transaction
+        Args:
+            scores: {resume_id: {field: value}} for the fields in SCORE_FIELDS
+        """
+        processed_at = datetime.now().isoformat()
+        # Rows are grouped by which fields they set, one UPDATE statement per group
+        groups: Dict[Tuple[str, ...], List[Tuple]] = {}
+        for resume_id, fields in scores.items():
+            names = tuple(field for field in SCORE_FIELDS if field in fields)
+            values = [
+                int(fields[field]) if field == "skill_gate_passed" and fields[field] is not None else fields[field]
+                for field in names
+            ]
+            groups.setdefault(names, []).append((*values, processed_at, session_id, resume_id))
+
+        with self._lock:
+            for names, rows in groups.items():
+                assignments = "".join(f"{field} = ?, " for field in names)
+                self._conn.executemany(
+                    f"UPDATE resumes SET {assignments}processed_at = ? WHERE session_id = ? AND resume_id = ?",
+                    rows
+                )
+            self._conn.commit()
+
+    def update_cluster_labels(self, session_id: str, labels: Dict[str, int]):
+        """Bulk write-back of cluster labels ({resume_id: label}) in one transaction"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE resumes SET cluster_label = ? WHERE session_id = ? AND resume_id = ?",
+                [(int(label), session_id, resume_id) for resume_id, label in labels.items()]
+            )
+            self._conn.commit()
+
+    def get_session_version(self, session_id: str) -> int:
+        """Version of the session's embedding set, changes whenever a resume embedding is added or removed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row["version"] if row is not None else 0
+
+    def get_embedding_matrix(self, session_id: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Get the session's embedding matrix for vectorized ranking
+        Returns (resume_ids, L2-normalized float32 matrix, raw norms) with rows aligned to resume_ids
+        Loaded with one query and kept in memory until the session version changes
+        """
+        with self._lock:
+            version = self.get_session_version(session_id)
+            cached = self._matrices.get(session_id)
+            if cached is None or cached[0] != version:
+                rows = self._conn.execute(
+                    "SELECT resume_id, embedding FROM resumes "
+                    "WHERE session_id = ? AND embedding IS NOT NULL ORDER BY rowid",
+                    (session_id,)
+                ).fetchall()
+                resume_ids = [row["resume_id"] for row in rows]
+                if rows:
+                    raw = np.frombuffer(b"".join(row["embedding"] for row in rows), dtype=np.float32)
+                    raw = raw.reshape(len(rows), -1)
+                else:
+                    raw = np.zeros((0, 0), dtype=np.float32)
+                norms = np.linalg.norm(raw, axis=1).astype(np.float32)
+                safe_norms = np.where(norms > 0, norms, 1.0).astype(np.float32)
+                matrix = raw / safe_norms[:, None]
+                cached = (version, resume_ids, matrix, norms)
+                # Unknown or empty sessions are not cached, so reads of them allocate nothing lasting
+                if resume_ids:
+                    self._matrices[session_id] = cached
+
+            _, resume_ids, matrix, norms = cached
+            if resume_ids:
+                self._touch(session_id)
+            # Copies, so callers can compute on them while resumes are added or removed
+            return list(resume_ids), matrix.copy(), norms.copy()
+
+    def get_all_candidates(self, session_id: str) -> List[ResumeRecord]:
+        """Get all candidates for a specific session"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.RECORD_COLUMNS} FROM resumes WHERE session_id = ? ORDER BY rowid", (session_id,)
+            ).fetchall()
+            if rows:
+                self._touch(session_id)
+        return [self._to_record(row) for row in rows]
+
+    def delete_resume(self, session_id: str, resume_id: str) -> bool:
+        """Delete a resume by ID (only if it belongs to the session). Returns True if deleted, False if not found"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM resumes WHERE session_id = ? AND resume_id = ?",
+                (session_id, resume_id)
+            ).rowcount
+            if deleted:
+                self._bump_version(session_id)
+            self._conn.commit()
+            return bool(deleted)
+
+    def clear_all(self, session_id: str):
+        """Clear all stored data for a specific session"""
+        with self._lock:
+            self._conn.execute("DELETE FROM resumes WHERE session_id = ?", (session_id,))
+            self._bump_version(session_id)
+            self._conn.commit()
+            self._matrices.pop(session_id, None)
+
+    def sweep(self) -> List[str]:
+        """
+        Record session access times, delete sessions idle longer than session_ttl and drop the
+        least recently used cached matrices while they exceed max_bytes. Returns the deleted session IDs
+        """
+        evicted = []
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ?",
+                [(last_access, session_id) for session_id, last_access in self._last_access.items()]
+            )
+
+            if self.session_ttl is not None:
+                cutoff = time.time() - self.session_ttl
+                evicted = [
+                    row["session_id"] for row in self._conn.execute(
+                        "SELECT session_id FROM sessions WHERE last_access < ?", (cutoff,)
+                    )
+                ]
+                self._conn.executemany("DELETE FROM resumes WHERE session_id = ?", [(sid,) for sid in evicted])
+                self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(sid,) for sid in evicted])
+                for session_id in evicted:
+                    self._matrices.pop(session_id, None)
+                    self._last_access.pop(session_id, None)
+            self._conn.commit()
+
+            if self.max_bytes is not None:
+                cached_bytes = sum(matrix.nbytes + norms.nbytes for _, _, matrix, norms in self._matrices.values())
+                for session_id in list(self._last_access):
+                    if cached_bytes <= self.max_bytes:
+                        break
+                    cached = self._matrices.pop(session_id, None)
+                    if cached is not None:
+                        cached_bytes -= cached[2].nbytes + cached[3].nbytes
+
+        for session_id in evicted:
+            for listener in self._eviction_listeners:
+                listener(session_id)
+        return evicted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,48 @@
+from typing import Dict
+
+from modules.preprocessor import TextPreprocessor
+from modules.skill_extractor import SkillExtractor
+from modules.category_classifier import CategoryClassifier
+from modules.keyword_matcher import KeywordMatcher
+
+class TextAnalyzer:
+    """Analyze a document once: cleaned text, skills and category from one shared scan"""
+    
+    def __init__(
+        self,
+        preprocessor: TextPreprocessor,
+        skill_extractor: SkillExtractor,
+        category_classifier: CategoryClassifier
+    ):
+        self.preprocessor = preprocessor
+        self.skill_extractor = skill_extractor
+        self.category_classifier = category_classifier
+        # One automaton over skill and category keywords, so both come out of the same pass
+        self.matcher = KeywordMatcher(skill_extractor.skills)
+        self.matcher.add_keywords(category_classifier.keywords)
+    
+    def analyze(self, text: str) -> Dict:
+        """
+        Lowercase and scan the text once and derive every text feature from it
+        
+        Returns:
+            Dictionary with processed_text (for embedding), skills, category_scores and category
+        """
+        if not text:
+            return {
+                "processed_text": "",
+                "skills": [],
+                "category_scores": {},
+                "category": None
+            }
+        
+        text_lower = text.lower()
+        keyword_counts = self.matcher.count(text_lower)
+        category_scores = self.category_classifier.category_scores(keyword_counts)
+        
+        return {
+            "processed_text": self.preprocessor.clean(text_lower),
+            "skills": self.skill_extractor.skills_from_counts(keyword_counts),
+            "category_scores": category_scores,
+            "category": self.category_classifier.classify_scores(category_scores)
+        }
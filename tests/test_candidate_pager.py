@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from modules.candidate_pager import CandidatePager
+from modules.resume_record import ResumeRecord
+
+def make_candidates(scores):
+    candidates = []
+    for i, score in enumerate(scores):
+        candidate = ResumeRecord(
+            resume_id=f"id-{i:03d}", filename=f"{i}.pdf", text="", uploaded_at=f"2024-01-01T00:00:{i % 7:02d}"
+        )
+        candidate.similarity_score = score
+        candidates.append(candidate)
+    return candidates
+
+def full_sort(candidates):
+    return sorted(candidates, key=lambda c: (-c.similarity_score, c.uploaded_at, c.resume_id))
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pages_match_a_full_sort(seed):
+    rng = random.Random(seed)
+    # Few distinct scores, so many ties cross page boundaries
+    candidates = make_candidates([rng.choice([0.1, 0.5, 0.5, 0.9]) for _ in range(rng.randint(1, 60))])
+    expected = full_sort(candidates)
+    limit = rng.randint(1, 10)
+    offset = rng.randint(0, 5)
+
+    page = CandidatePager().select(candidates, limit=limit, offset=offset)
+    assert page["candidates"] == expected[offset:offset + limit]
+    assert page["total"] == len(candidates)
+
+def test_cursor_walks_every_candidate_once():
+    candidates = make_candidates([round(random.Random(1).random(), 1) for _ in range(45)])
+    pager = CandidatePager()
+    seen = []
+    cursor = None
+    while True:
+        page = pager.select(candidates, limit=7, cursor=cursor)
+        assert page["total"] == len(candidates)
+        seen += page["candidates"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == full_sort(candidates)
+
+def test_min_score_and_no_limit():
+    candidates = make_candidates([0.2, 0.8, 0.5, 0.8])
+    page = CandidatePager().select(candidates, min_score=0.5)
+    assert [c.similarity_score for c in page["candidates"]] == [0.8, 0.8, 0.5]
+    assert page["total"] == 3 and page["next_cursor"] is None
+
+def test_total_ignores_cursor():
+    candidates = make_candidates([0.2, 0.8, 0.5, 0.8, 0.9])
+    pager = CandidatePager()
+    first = pager.select(candidates, limit=2, min_score=0.5)
+    second = pager.select(candidates, limit=2, offset=1, cursor=first["next_cursor"], min_score=0.5)
+    assert [c.similarity_score for c in second["candidates"]] == [0.5]
+    assert first["total"] == second["total"] == 4 and second["next_cursor"] is None
+
+def test_offset_past_the_end():
+    page = CandidatePager().select(make_candidates([0.1, 0.2]), limit=5, offset=10)
+    assert page == {"candidates": [], "total": 2, "next_cursor": None}
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        CandidatePager().select(make_candidates([0.1]), cursor="not-a-cursor")
@@ -0,0 +1,131 @@
+import time
+
+import numpy as np
+import pytest
+
+from modules.data_store import DataStore
+from modules.sqlite_data_store import SQLiteDataStore
+
+@pytest.fixture
+def stores(tmp_path):
+    sqlite_store = SQLiteDataStore(str(tmp_path / "resumes.db"), session_ttl=60)
+    yield DataStore(session_ttl=60), sqlite_store
+    sqlite_store.close()
+
+def features(seed: int, skills=("python",)):
+    rng = np.random.default_rng(seed)
+    return {
+        "processed_text": f"resume {seed}",
+        "skills": list(skills),
+        "category": "software_development",
+        "embedding": rng.normal(size=8).astype(np.float32)
+    }
+
+def fill(store, session_id="s"):
+    """Add the same resumes to a store; returns their IDs by filename"""
+    return {
+        f"{i}.pdf": store.add_resume(session_id, f"{i}.pdf", f"text {i}", features(i, skills=("python", f"skill{i}")))
+        for i in range(4)
+    }
+
+def snapshot(store, session_id="s"):
+    """Store contents keyed by filename, independent of the generated resume IDs"""
+    candidates = store.get_all_candidates(session_id)
+    ids = {candidate.resume_id: candidate.filename for candidate in candidates}
+    records = {
+        candidate.filename: {
+            key: value for key, value in candidate.to_dict().items()
+            if key not in ("resume_id", "uploaded_at", "processed_at")
+        }
+        for candidate in candidates
+    }
+    resume_ids, matrix, norms = store.get_embedding_matrix(session_id)
+    rows = {ids[resume_id]: (matrix[i], norms[i]) for i, resume_id in enumerate(resume_ids)}
+    return records, rows
+
+def assert_same(memory, sqlite, session_id="s"):
+    memory_records, memory_rows = snapshot(memory, session_id)
+    sqlite_records, sqlite_rows = snapshot(sqlite, session_id)
+    assert memory_records == sqlite_records
+    assert memory_rows.keys() == sqlite_rows.keys()
+    for filename, (row, norm) in memory_rows.items():
+        np.testing.assert_allclose(sqlite_rows[filename][0], row, rtol=1e-6)
+        assert sqlite_rows[filename][1] == pytest.approx(norm)
+
+def test_ingest_and_matrix(stores):
+    for store in stores:
+        fill(store)
+    assert_same(*stores)
+
+def test_raw_embedding_round_trip(stores):
+    for store in stores:
+        ids = fill(store)
+        np.testing.assert_allclose(store.get_embedding("s", ids["2.pdf"]), features(2)["embedding"], rtol=1e-6)
+        assert store.get_embedding("s", "missing") is None
+
+def test_feature_update_without_embedding_keeps_it(stores):
+    for store in stores:
+        ids = fill(store)
+        version = store.get_session_version("s")
+        store.update_resume_features("s", ids["1.pdf"], "updated", ["rust"], None, None, cluster_label=2)
+        assert store.get_session_version("s") == version
+        np.testing.assert_allclose(store.get_embedding("s", ids["1.pdf"]), features(1)["embedding"], rtol=1e-6)
+    assert_same(*stores)
+
+def test_scores_and_labels(stores):
+    for store in stores:
+        ids = fill(store)
+        version = store.get_session_version("s")
+        store.update_scores("s", {
+            ids["0.pdf"]: {"similarity_score": 0.9, "semantic_similarity": 0.8, "skill_coverage": 1.0,
+                           "skill_gate_passed": True, "flag": "note"},
+            ids["1.pdf"]: {"similarity_score": 0.1, "semantic_similarity": 0.2, "skill_coverage": 0.0,
+                           "skill_gate_passed": False, "flag": None}
+        })
+        # A later score write can clear the flag
+        store.update_scores("s", {ids["0.pdf"]: {"flag": None}})
+        store.update_cluster_labels("s", {ids["2.pdf"]: 1, ids["3.pdf"]: 2})
+        store.update_resume_processing("s", ids["3.pdf"], 0.5, ["go"], 0, None)
+        assert store.get_session_version("s") == version
+    assert_same(*stores)
+
+def test_delete_and_clear(stores):
+    for store in stores:
+        ids = fill(store)
+        version = store.get_session_version("s")
+        assert store.delete_resume("s", ids["1.pdf"])
+        assert not store.delete_resume("s", ids["1.pdf"])
+        assert not store.delete_resume("other", ids["2.pdf"])
+        assert store.get_session_version("s") != version
+    assert_same(*stores)
+    for store in stores:
+        store.clear_all("s")
+        assert store.get_all_candidates("s") == []
+    assert_same(*stores)
+
+def test_sessions_are_isolated(stores):
+    for store in stores:
+        ids = fill(store, "a")
+        assert store.get_resume("b", ids["0.pdf"]) is None
+        assert store.get_all_candidates("b") == []
+        resume_ids, matrix, _ = store.get_embedding_matrix("b")
+        assert resume_ids == [] and len(matrix) == 0
+
+def test_sweep_expires_idle_sessions(stores):
+    for store in stores:
+        store.session_ttl = 0.05
+        fill(store, "idle")
+        # Clearing an unknown session must not leave anything the sweep can't expire
+        store.clear_all("never-seen")
+        evicted = []
+        store.add_eviction_listener(evicted.append)
+        time.sleep(0.1)
+        fill(store, "active")
+        swept = store.sweep()
+        assert "idle" in swept and "active" not in swept
+        assert evicted == swept
+        assert store.get_all_candidates("idle") == []
+        assert len(store.get_all_candidates("active")) == 4
+    sqlite_store = stores[1]
+    remaining = sqlite_store._conn.execute("SELECT session_id FROM sessions").fetchall()
+    assert [row[0] for row in remaining] == ["active"]
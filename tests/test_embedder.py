@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from modules.embedder import Embedder
+from modules.quantization import Int8Quantizer
+
+WORDS = "python java sql docker kubernetes react developer engineer data machine learning cloud with and in".split()
+
+@pytest.fixture(scope="module")
+def tiny_model_path(tmp_path_factory):
+    """A small randomly initialized BERT saved locally, so no model is downloaded"""
+    path = tmp_path_factory.mktemp("tiny-model")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS + list("abcdefghijklmnopqrstuvwxyz0123456789")
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    tokenizer = transformers.BertTokenizerFast(str(path / "vocab.txt"))
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+        intermediate_size=128, max_position_embeddings=128
+    )
+    torch.manual_seed(0)
+    transformers.BertModel(config).save_pretrained(str(path))
+    tokenizer.save_pretrained(str(path))
+    return str(path)
+
+def build_model(path):
+    from sentence_transformers import SentenceTransformer, models
+    transformer = models.Transformer(path, max_seq_length=32)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    return SentenceTransformer(modules=[transformer, pooling], device="cpu")
+
+def test_int8_backend_within_drift(tiny_model_path):
+    embedder = Embedder(model_name="tiny", model=build_model(tiny_model_path), quantizer=Int8Quantizer(max_drift=0.05))
+    assert embedder.backend == "int8"
+    assert embedder.model_id.startswith("tiny:int8")
+    report = embedder.quantization_report
+    assert report["accepted"] and report["drift"] <= 0.05
+    assert report["texts"] == len(Int8Quantizer.DEFAULT_VALIDATION_TEXTS)
+
+    reference = build_model(tiny_model_path)
+    texts = ["python developer with sql", "react engineer"]
+    expected = reference.encode(texts, convert_to_numpy=True)
+    actual = embedder.embed_batch(texts)
+    cosines = np.sum(expected * actual, axis=1) / (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+    assert cosines.min() > 0.95
+
+def test_falls_back_to_float32_when_drift_is_too_large(tiny_model_path):
+    embedder = Embedder(model_name="tiny", model=build_model(tiny_model_path), quantizer=Int8Quantizer(max_drift=0.0))
+    assert embedder.backend == "float32"
+    assert not embedder.quantization_report["accepted"]
+    assert embedder.model_id.startswith("tiny|")
+
+def test_long_texts_are_chunked_not_truncated(tiny_model_path):
+    embedder = Embedder(model_name="tiny", model=build_model(tiny_model_path))
+    long_text = " ".join(["python developer"] * 40 + ["kubernetes cloud engineer"] * 40)
+    chunks = embedder._chunk(long_text)
+    assert len(chunks) > 1 and all(length <= 30 for _, length in chunks)
+    assert "kubernetes" in chunks[-1][0]
+    short = embedder.embed_batch(["python developer"])[0]
+    np.testing.assert_allclose(short, build_model(tiny_model_path).encode(["python developer"])[0], atol=1e-5)
+
+def test_chunk_tokens_capped_by_sequence_length(tiny_model_path):
+    embedder = Embedder(model_name="tiny", model=build_model(tiny_model_path), chunk_tokens=500)
+    chunks = embedder._chunk(" ".join(["python developer"] * 40))
+    assert len(chunks) > 1 and all(length <= 30 for _, length in chunks)
@@ -0,0 +1,51 @@
+import re
+
+import pytest
+
+from modules.keyword_matcher import KeywordMatcher
+from modules.skill_extractor import SkillExtractor
+
+@pytest.mark.parametrize("text, keyword", [
+    ("Skilled in C++ and Java", "c++"),
+    ("modern c++11 and c++17", "c++"),
+    ("c#, f# and .net", "c#"),
+    ("worked with c#8 features", "c#"),
+    ("backend in node.js.", "node.js"),
+    ("built ci/cd pipelines", "ci/cd"),
+    ("asp.net mvc", "asp.net"),
+    ("python", "python"),
+])
+def test_matches_whole_terms(text, keyword):
+    assert keyword in KeywordMatcher([keyword]).find(text.lower())
+
+@pytest.mark.parametrize("text, keyword", [
+    ("javascript developer", "java"),
+    ("golang", "go"),
+    ("pythonic code", "python"),
+    ("rustacean", "rust"),
+    ("node.jsx", "node.js"),
+    ("xci/cd", "ci/cd"),
+])
+def test_rejects_partial_words(text, keyword):
+    assert keyword not in KeywordMatcher([keyword]).find(text)
+
+def test_counts_overlapping_keywords():
+    matcher = KeywordMatcher(["java", "javascript", "script"])
+    assert matcher.count("java, javascript and java") == {"java": 2, "javascript": 1}
+
+def test_keywords_added_after_a_scan():
+    matcher = KeywordMatcher(["python"])
+    assert matcher.find("python and rust") == {"python"}
+    matcher.add_keywords(["rust"])
+    assert matcher.find("python and rust") == {"python", "rust"}
+
+def test_finds_everything_the_old_word_boundary_patterns_found():
+    text = (
+        "senior engineer: c++11, c#8, node.js, asp.net, ci/cd, go, javascript, react.js; "
+        "python/django, aws-lambda, machine learning, t-sql, .net core, c++ and f#"
+    )
+    old = {
+        skill for skill in SkillExtractor.SKILL_KEYWORDS
+        if re.search(r"\b" + re.escape(skill) + r"\b", text)
+    }
+    assert old <= KeywordMatcher(SkillExtractor.SKILL_KEYWORDS).find(text)